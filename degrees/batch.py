@@ -0,0 +1,157 @@
+import csv
+import json
+import multiprocessing
+import sys
+
+import snapshot
+
+from degrees import get_path
+
+# Graph opened by each pool worker; see init_worker
+worker_graph = None
+
+
+def main():
+    args = sys.argv[1:]
+    workers = 1
+    if len(args) >= 2 and args[0] == "-j":
+        workers = int(args[1])
+        args = args[2:]
+    if len(args) not in [1, 2]:
+        sys.exit("Usage: python batch.py [-j workers] directory [pairs.csv]")
+    directory = args[0]
+
+    # Pairs come one per line as "source,target" (IDs or exact names)
+    if len(args) == 2 and args[1] != "-":
+        with open(args[1], encoding="utf-8") as f:
+            pairs = read_pairs(f)
+    else:
+        pairs = read_pairs(sys.stdin)
+
+    if workers > 1:
+        results = run_parallel(directory, pairs, workers)
+    else:
+        results = run_batch(snapshot.load(directory), pairs)
+    for result in results:
+        print(json.dumps(result), flush=True)
+
+
+def read_pairs(f):
+    """
+    Returns a list of (line, source, target) from CSV rows.
+    """
+    pairs = []
+    for line, row in enumerate(csv.reader(f), 1):
+        if len(row) == 0:
+            continue
+        if len(row) != 2:
+            sys.exit(f"Line {line}: expected source,target")
+        pairs.append((line, row[0].strip(), row[1].strip()))
+    return pairs
+
+
+def resolve(graph, key):
+    """
+    Returns the person index for an ID, or for a name matching
+    exactly one person. Otherwise returns None.
+    """
+    p = graph.person_index.get(key)
+    if p is not None:
+        return p
+    matches = graph.names.get(key.lower(), [])
+    if len(matches) == 1:
+        return matches[0]
+    return None
+
+
+def group_queries(graph, pairs):
+    """
+    Groups pairs by source person so each source needs one BFS tree.
+
+    Returns a dict of source index -> [(line, source, target, target index)]
+    and a list of results for pairs that could not be resolved.
+    """
+    groups = {}
+    errors = []
+    for line, source, target in pairs:
+        s = resolve(graph, source)
+        t = resolve(graph, target)
+        if s is None or t is None:
+            errors.append({"line": line, "source": source, "target": target,
+                           "error": "Person not found."})
+            continue
+        groups.setdefault(s, []).append((line, source, target, t))
+    return groups, errors
+
+
+def answer_group(graph, s, queries):
+    """
+    Answers every query sharing source index `s` from one BFS tree.
+
+    Targets in another connected component are answered as not
+    connected without searching; otherwise the tree would never reach
+    them and the search would cover the source's whole component.
+    """
+    components = graph.components
+    targets = [t for _, _, _, t in queries
+               if components is None or components[t] == components[s]]
+    backtrack = graph.bfs_tree(s, targets=targets)
+    results = []
+    for line, source, target, t in queries:
+        result = {"line": line, "source": source, "target": target}
+        if t in backtrack:
+            path = [(graph.movie_ids[m], graph.person_ids[p])
+                    for m, p in get_path(backtrack, s, t)]
+            result["degrees"] = len(path)
+            result["path"] = path
+        else:
+            result["degrees"] = None
+            result["path"] = None
+        results.append(result)
+    return results
+
+
+def run_batch(graph, pairs):
+    """
+    Yields one result dict per pair, a source group at a time.
+
+    Results are streamed in group order; `line` gives each result's
+    position in the input.
+    """
+    groups, errors = group_queries(graph, pairs)
+    yield from errors
+    for s, queries in groups.items():
+        yield from answer_group(graph, s, queries)
+
+
+def run_parallel(directory, pairs, workers):
+    """
+    Like `run_batch`, but answers source groups on a pool of processes.
+
+    Workers memory-map the same snapshot file instead of receiving a
+    pickled graph, so they share its pages. Results come back in the
+    same order `run_batch` would produce them.
+    """
+    graph = snapshot.load(directory)
+    groups, errors = group_queries(graph, pairs)
+    yield from errors
+
+    chunksize = max(1, len(groups) // (workers * 4))
+    with multiprocessing.Pool(workers, initializer=init_worker,
+                              initargs=(snapshot.snapshot_path(directory),)) as pool:
+        for results in pool.imap(answer_group_in_worker, groups.items(), chunksize):
+            yield from results
+
+
+def init_worker(path):
+    global worker_graph
+    worker_graph = snapshot.open_snapshot(path)
+
+
+def answer_group_in_worker(group):
+    s, queries = group
+    return answer_group(worker_graph, s, queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import degrees
+import snapshot
+
+from graph import Graph
+
+# dicts-bfs: one-sided BFS over util frontiers; dicts: bidirectional BFS
+LAYOUTS = ["dicts-bfs", "dicts", "csr", "snapshot"]
+QUERIES = 20
+MAX_DEGREE = 6
+SEED = 50
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] in LAYOUTS:
+        with open(sys.argv[3], encoding="utf-8") as f:
+            queries = json.load(f)
+        print(json.dumps(run_layout(sys.argv[1], sys.argv[2], queries)))
+        return
+    if len(sys.argv) not in [2, 3, 4]:
+        sys.exit("Usage: python benchmark.py directory [queries per degree] [layout,...]")
+    directory = sys.argv[1]
+    per_degree = int(sys.argv[2]) if len(sys.argv) >= 3 else QUERIES
+    layouts = sys.argv[3].split(",") if len(sys.argv) == 4 else LAYOUTS
+
+    queries = queries_by_degree(Graph.from_csv(directory), random.Random(SEED), per_degree)
+    found = {d: sum(1 for q in queries if q[2] == d) for d in range(1, MAX_DEGREE + 1)}
+    print("Queries per degree: " + ", ".join(f"{d}: {n}" for d, n in found.items()))
+
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump(queries, f)
+    try:
+        # Every layout runs in its own process so peak RSS is not shared
+        print(f"{'layout':<10} {'deg':>3} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+              f"{'expanded':>10} {'edges':>11}")
+        for layout in layouts:
+            output = subprocess.run(
+                [sys.executable, __file__, layout, directory, f.name],
+                capture_output=True, text=True, check=True
+            ).stdout
+            report = json.loads(output)
+            for degree, row in report["degrees"].items():
+                print(f"{layout:<10} {degree:>3} {row['p50']:>9.3f} {row['p95']:>9.3f} "
+                      f"{row['p99']:>9.3f} {row['expanded']:>10.0f} {row['edges']:>11.0f}")
+            print(f"{layout:<10} load {report['load']:.2f}s, peak {report['peak_mb']:.1f} MB")
+    finally:
+        os.remove(f.name)
+
+
+def queries_by_degree(graph, rng, per_degree, max_degree=MAX_DEGREE, attempts=1000):
+    """
+    Returns up to `per_degree` [source, target, degree] queries for each
+    degree from 1 to `max_degree`, found by BFS layers from random sources.
+    """
+    queries = []
+    wanted = {d: per_degree for d in range(1, max_degree + 1)}
+    for _ in range(attempts):
+        if not any(wanted.values()):
+            break
+        s = rng.randrange(graph.num_people())
+        visited = {s}
+        layer = [s]
+        for degree in range(1, max_degree + 1):
+            next_layer = []
+            for p in layer:
+                for m in graph.movies_of(p):
+                    for q in graph.stars_of(m):
+                        if q not in visited:
+                            visited.add(q)
+                            next_layer.append(q)
+            layer = next_layer
+            if not layer:
+                break
+            if wanted[degree]:
+                wanted[degree] -= 1
+                t = rng.choice(layer)
+                queries.append([graph.person_ids[s], graph.person_ids[t], degree])
+    return queries
+
+
+def run_layout(layout, directory, queries):
+    """
+    Load `directory` with the given layout, answer every query and report
+    load time, peak RSS, latency percentiles and search counters per degree.
+    """
+    start = time.perf_counter()
+    if layout.startswith("dicts"):
+        degrees.load_data(directory)
+        bidirectional = layout == "dicts"
+
+        def shortest_path(source, target, stats):
+            return degrees.shortest_path(source, target, bidirectional, stats, use_labels=False)
+    else:
+        if layout == "csr":
+            graph = Graph.from_csv(directory)
+        else:
+            graph = snapshot.load(directory)
+        shortest_path = graph.shortest_path
+    load = time.perf_counter() - start
+
+    # Each query is timed without counters, then run again untimed to
+    # collect them, so the latencies are those of the plain search
+    samples = {}
+    for source, target, degree in queries:
+        start = time.perf_counter()
+        path = shortest_path(source, target, None)
+        elapsed = time.perf_counter() - start
+        if path is None or len(path) != degree:
+            raise ValueError(f"{layout}: wrong answer for {source} -> {target}")
+        stats = {"expanded": 0, "edges": 0}
+        shortest_path(source, target, stats)
+        samples.setdefault(degree, []).append((elapsed, stats))
+
+    report = {}
+    for degree, rows in sorted(samples.items()):
+        latencies = sorted(1000 * elapsed for elapsed, _ in rows)
+        report[degree] = {
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "expanded": sum(stats["expanded"] for _, stats in rows) / len(rows),
+            "edges": sum(stats["edges"] for _, stats in rows) / len(rows),
+        }
+
+    return {
+        "load": load,
+        "peak_mb": peak_rss() / 1024,
+        "degrees": report,
+    }
+
+
+def percentile(values, p):
+    """
+    Nearest-rank percentile of already sorted `values`.
+    """
+    rank = max(1, -(-p * len(values) // 100))
+    return values[rank - 1]
+
+
+def peak_rss():
+    """
+    Returns the peak resident set size of this process in KiB.
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,13 @@
 import csv
 import sys
 
-from util import Node, StackFrontier, QueueFrontier
+import snapshot
+
+from util import Node, StackFrontier, QueueFrontier, count_expansion
 from collections import defaultdict
+from graph import ComponentTable, MovieTable, NameTable, PeopleTable, count_components
+from labels import load_labels
+from lookup import NameIndex
 
 # Maps names to a set of corresponding person_ids
 # "Kevin Bacon" -> 102
@@ -16,6 +21,21 @@ people = {}
 # 104257 -> {title: "A Few Good Men", year: 1992, stars: {102, 129, 193, 197}}
 movies = {}
 
+# Maps person_ids to the id of their connected component
+# 102 -> 102 (every person in a component shares one representative id)
+components = {}
+
+# Sorted index over normalized names (see lookup.py), read from the
+# snapshot or built on first use
+name_index = None
+
+# Optional precomputed distance index (see labels.py), used when fresh
+hub_labels = None
+
+# Memory-mapped snapshot (see snapshot.py) behind the maps above, once
+# `load_snapshot` replaces them with views of it
+graph = None
+
 # backtrack -> (104257, 102) -> (104257, 129)
 
 def load_data(directory):
@@ -46,7 +66,9 @@ def load_data(directory):
                 "stars": set()
             }
 
-    # Load stars
+    # Load stars, joining every star of a movie into one component
+    parent = {person_id: person_id for person_id in people}
+    first_star = {}
     with open(f"{directory}/stars.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
@@ -54,7 +76,55 @@ def load_data(directory):
                 people[row["person_id"]]["movies"].add(row["movie_id"])
                 movies[row["movie_id"]]["stars"].add(row["person_id"])
             except KeyError:
-                pass
+                continue
+            union(parent, row["person_id"], first_star.setdefault(row["movie_id"], row["person_id"]))
+
+    for person_id in people:
+        components[person_id] = find(parent, person_id)
+
+
+def load_snapshot(directory):
+    """
+    Memory-map the snapshot of `directory`, compiling it first if it is
+    missing or the CSVs changed, and serve `people`, `movies`, `names`
+    and `components` from it. Nothing is parsed, so startup takes
+    milliseconds instead of the seconds `load_data` needs.
+    """
+    global graph, people, movies, names, components
+    graph = snapshot.load(directory)
+    people = PeopleTable(graph)
+    movies = MovieTable(graph)
+    names = NameTable(graph)
+    components = ComponentTable(graph)
+
+
+def find(parent, person_id):
+    """
+    Returns the representative of `person_id` in the union-find `parent`.
+    """
+    while parent[person_id] != person_id:
+        # Path halving keeps the trees shallow
+        parent[person_id] = parent[parent[person_id]]
+        person_id = parent[person_id]
+    return person_id
+
+
+def union(parent, a, b):
+    a = find(parent, a)
+    b = find(parent, b)
+    if a != b:
+        parent[b] = a
+
+
+def component_stats():
+    """
+    Returns the number of connected components, the size of the largest
+    one and the number of people who share no movie with anyone. A
+    snapshot stores them, so only the CSV path counts labels here.
+    """
+    if graph is not None:
+        return graph.component_stats
+    return count_components(components.values())
 
 
 def main():
@@ -64,15 +134,25 @@ def main():
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_snapshot(directory)
     print("Data loaded.")
+    stats = component_stats()
+    print(f"{stats['components']} components, largest has {stats['largest']} people, "
+          f"{stats['isolated']} people isolated.")
+
+    global hub_labels
+    hub_labels = load_labels(directory)
+    if hub_labels is None:
+        print("No up-to-date hub-label index, using BFS.")
 
-    source = person_id_for_name(input("Name: "))
+    name = input("Name: ")
+    source = person_id_for_name(name)
     if source is None:
-        sys.exit("Person not found.")
-    target = person_id_for_name(input("Name: "))
+        not_found(name)
+    name = input("Name: ")
+    target = person_id_for_name(name)
     if target is None:
-        sys.exit("Person not found.")
+        not_found(name)
 
     path = shortest_path(source, target)
 
@@ -89,12 +169,35 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, bidirectional=True, stats=None, use_labels=True):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
     If no possible path, returns None.
+
+    If `stats` is a dict, the search adds the number of people it
+    expands and edges it scans to its "expanded" and "edges".
+
+    When hub labels are loaded they answer the query and `bidirectional`
+    has no effect; pass `use_labels=False` to run a breadth-first search
+    anyway, as the benchmark does.
+    """
+    if components and components[source] != components[target]:
+        return None
+    if hub_labels is not None and use_labels:
+        neighbors = neighbors_for_person if graph is None else graph.neighbors_for_person
+        return hub_labels.shortest_path(source, target, neighbors, stats)
+    if bidirectional and graph is not None:
+        return graph.shortest_path(source, target, stats)
+    if bidirectional:
+        return bidirectional_path(source, target, stats)
+    return one_sided_path(source, target, stats)
+
+
+def one_sided_path(source, target, stats=None):
+    """
+    Breadth-first search expanding outwards from `source` only.
     """
 
     if source == target:
@@ -103,27 +206,117 @@ def shortest_path(source, target):
     backtrack = {}
     visited = defaultdict(bool)
     queue = QueueFrontier()
+    expanded = 0
+    edges = 0
 
-    queue.add(source)
+    queue.add(Node(source, None, None))
 
     while queue.empty() != True:
 
-        current_person = queue.remove()
+        current_person = queue.remove().state
         if visited[current_person] == True:
             continue
         visited[current_person] = True
+        expanded += 1
 
         for movie in people[current_person]["movies"]:
-            for next_person in movies[movie]["stars"]:
+            stars = movies[movie]["stars"]
+            edges += len(stars)
+            for next_person in stars:
                 if visited[next_person] == True:
                     continue
                 if next_person != current_person and next_person not in backtrack:
                     backtrack[next_person] = (movie, current_person)
                 if next_person == target:
+                    count_expansion(stats, expanded, edges)
                     return get_path(backtrack, source, target)
-                queue.add(next_person)
+                if queue.contains_state(next_person):
+                    continue
+                queue.add(Node(next_person, current_person, movie))
+    count_expansion(stats, expanded, edges)
+    return None
+
+
+def bidirectional_path(source, target, stats=None):
+    """
+    Breadth-first search expanding from both `source` and `target`,
+    stopping once the two frontiers meet.
+
+    Each step expands one whole layer of the smaller frontier, so the
+    first layer that touches the other side contains the meeting point
+    of a shortest path.
+    """
+
+    if source == target:
+        return get_path({}, source, target)
+
+    # backtrack_source[p] -> (movie, previous person towards source)
+    # backtrack_target[p] -> (movie, next person towards target)
+    backtrack_source = {source: None}
+    backtrack_target = {target: None}
+    depth_source = {source: 0}
+    depth_target = {target: 0}
+    frontier_source = [source]
+    frontier_target = [target]
+    expanded = 0
+    edges = 0
+
+    while frontier_source and frontier_target:
+
+        # Always grow the cheaper side
+        if len(frontier_source) <= len(frontier_target):
+            frontier, backtrack, depth = frontier_source, backtrack_source, depth_source
+            other_depth = depth_target
+        else:
+            frontier, backtrack, depth = frontier_target, backtrack_target, depth_target
+            other_depth = depth_source
+
+        next_frontier = []
+        meeting = None
+        best = None
+        expanded += len(frontier)
+        for current_person in frontier:
+            for movie in people[current_person]["movies"]:
+                stars = movies[movie]["stars"]
+                edges += len(stars)
+                for next_person in stars:
+                    if next_person in backtrack:
+                        continue
+                    backtrack[next_person] = (movie, current_person)
+                    depth[next_person] = depth[current_person] + 1
+                    if next_person in other_depth:
+                        length = depth[next_person] + other_depth[next_person]
+                        if best is None or length < best:
+                            best = length
+                            meeting = next_person
+                    next_frontier.append(next_person)
+
+        if meeting is not None:
+            count_expansion(stats, expanded, edges)
+            return join_paths(backtrack_source, backtrack_target, source, target, meeting)
+
+        if frontier is frontier_source:
+            frontier_source = next_frontier
+        else:
+            frontier_target = next_frontier
+
+    count_expansion(stats, expanded, edges)
     return None
 
+
+def join_paths(backtrack_source, backtrack_target, source, target, meeting):
+    """
+    Joins the two halves of a bidirectional search at `meeting`
+    into the same format `get_path` returns.
+    """
+    path = get_path(backtrack_source, source, meeting)
+    person = meeting
+    while person != target:
+        movie, person = backtrack_target[person]
+        path.append((movie, person))
+    return path
+
+
 def get_path(backtrack, source, target):
     path = []
     while target != source:
@@ -132,15 +325,25 @@ def get_path(backtrack, source, target):
     path.reverse()
     return path
 
-def person_id_for_name(name):
+def person_id_for_name(name, birth=None, interactive=True):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    Names that differ only in accents or spacing still match. Ambiguous
+    names are narrowed down by `birth` year when given; if several people
+    remain and `interactive` is False, returns None instead of asking.
     """
     person_ids = list(names.get(name.lower(), set()))
+    if len(person_ids) == 0:
+        person_ids = get_name_index().exact(name)
+    if birth is not None and len(person_ids) > 1:
+        person_ids = [p for p in person_ids if people[p]["birth"] == str(birth)]
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
+        if not interactive:
+            return None
         print(f"Which '{name}'?")
         for person_id in person_ids:
             person = people[person_id]
@@ -158,6 +361,34 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def get_name_index():
+    global name_index
+    if name_index is None:
+        if graph is None:
+            name_index = NameIndex.from_people(people)
+        else:
+            name_index = snapshot.name_index(graph)
+    return name_index
+
+
+def not_found(name):
+    """
+    Exits, suggesting close matches for a name that matched nobody.
+    """
+    # Most typos are one edit away; searching two edits away costs
+    # several times more, so only do it when nothing closer exists
+    index = get_name_index()
+    matches = (index.fuzzy(name, max_distance=1, limit=5)
+               or index.fuzzy(name, max_distance=2, limit=5))
+    suggestions = []
+    for _, _, person_id in matches:
+        if people[person_id]["name"] not in suggestions:
+            suggestions.append(people[person_id]["name"])
+    if suggestions:
+        print(f"Did you mean: {', '.join(suggestions)}?")
+    sys.exit("Person not found.")
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
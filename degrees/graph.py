@@ -0,0 +1,436 @@
+import csv
+
+from array import array
+from collections import Counter
+from collections.abc import Mapping
+
+from util import count_expansion
+
+
+class Graph():
+    """
+    Compact, integer-indexed form of the degrees dataset.
+
+    Person and movie IDs are interned to dense ints (their position in
+    `person_ids` / `movie_ids`). The bipartite person-movie graph is kept
+    as CSR adjacency in both directions:
+
+        movies of person p -> person_movies[person_offsets[p]:person_offsets[p + 1]]
+        stars of movie m   -> movie_people[movie_offsets[m]:movie_offsets[m + 1]]
+
+    Public methods take and return the original string IDs, so paths have
+    the same (movie_id, person_id) format as `degrees.get_path`.
+
+    `person_index`, `movie_index` and `names` may be any mapping with
+    `[]` and `get`; they default to dicts built from the tables.
+    `components` optionally gives each person's component label, as
+    `label_components` computes it.
+    """
+
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies, movie_offsets, movie_people,
+                 person_index=None, movie_index=None, names=None, components=None):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+        if person_index is None:
+            person_index = {pid: i for i, pid in enumerate(person_ids)}
+        if movie_index is None:
+            movie_index = {mid: i for i, mid in enumerate(movie_ids)}
+        if names is None:
+            names = {}
+            for i, name in enumerate(person_names):
+                names.setdefault(name.lower(), []).append(i)
+        self.person_index = person_index
+        self.movie_index = movie_index
+        self.names = names
+        self.components = components
+
+    @classmethod
+    def from_csv(cls, directory):
+        """
+        Build a graph straight from the CSV files, without going through
+        the dict-of-sets representation.
+        """
+        person_ids, person_names, person_births = [], [], []
+        with open(f"{directory}/people.csv", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                person_ids.append(row["id"])
+                person_names.append(row["name"])
+                person_births.append(row["birth"])
+
+        movie_ids, movie_titles, movie_years = [], [], []
+        with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                movie_ids.append(row["id"])
+                movie_titles.append(row["title"])
+                movie_years.append(row["year"])
+
+        person_index = {pid: i for i, pid in enumerate(person_ids)}
+        movie_index = {mid: i for i, mid in enumerate(movie_ids)}
+        edges = set()
+        with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                p = person_index.get(row["person_id"])
+                m = movie_index.get(row["movie_id"])
+                if p is not None and m is not None:
+                    edges.add((p, m))
+
+        return cls(person_ids, person_names, person_births,
+                   movie_ids, movie_titles, movie_years,
+                   *build_csr(len(person_ids), len(movie_ids), edges))
+
+    @classmethod
+    def from_dicts(cls, people, movies):
+        """
+        Build a graph from the `people` and `movies` maps of degrees.py.
+        """
+        person_ids = list(people)
+        movie_ids = list(movies)
+        movie_index = {mid: i for i, mid in enumerate(movie_ids)}
+        edges = set()
+        for p, person_id in enumerate(person_ids):
+            for movie_id in people[person_id]["movies"]:
+                edges.add((p, movie_index[movie_id]))
+
+        return cls(person_ids,
+                   [people[pid]["name"] for pid in person_ids],
+                   [people[pid]["birth"] for pid in person_ids],
+                   movie_ids,
+                   [movies[mid]["title"] for mid in movie_ids],
+                   [movies[mid]["year"] for mid in movie_ids],
+                   *build_csr(len(person_ids), len(movie_ids), edges))
+
+    def num_people(self):
+        return len(self.person_ids)
+
+    def num_movies(self):
+        return len(self.movie_ids)
+
+    def movies_of(self, p):
+        """
+        Returns the movie indices of person index `p`.
+        """
+        return self.person_movies[self.person_offsets[p]:self.person_offsets[p + 1]]
+
+    def stars_of(self, m):
+        """
+        Returns the person indices of movie index `m`.
+        """
+        return self.movie_people[self.movie_offsets[m]:self.movie_offsets[m + 1]]
+
+    def person_id_for_name(self, name):
+        """
+        Returns every person ID whose name matches `name`, ignoring case.
+        """
+        return [self.person_ids[p] for p in self.names.get(name.lower(), [])]
+
+    def neighbors_for_person(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+        """
+        neighbors = set()
+        for m in self.movies_of(self.person_index[person_id]):
+            movie_id = self.movie_ids[m]
+            for q in self.stars_of(m):
+                neighbors.add((movie_id, self.person_ids[q]))
+        return neighbors
+
+    def shortest_path(self, source, target, stats=None):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target.
+
+        If no possible path, returns None.
+        """
+        path = self.index_path(self.person_index[source], self.person_index[target], stats)
+        if path is None:
+            return None
+        return [(self.movie_ids[m], self.person_ids[p]) for m, p in path]
+
+    def index_path(self, s, t, stats=None):
+        """
+        Bidirectional breadth-first search over person indices.
+
+        Returns a list of (movie index, person index) pairs, or None.
+        Search counters are added to `stats` as in `degrees.shortest_path`.
+        """
+        if s == t:
+            return []
+
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+
+        # parents[p] -> (movie, neighbour of p towards that side's root)
+        parents_source = {s: None}
+        parents_target = {t: None}
+        depth_source = {s: 0}
+        depth_target = {t: 0}
+        frontier_source = [s]
+        frontier_target = [t]
+        expanded = 0
+        edges = 0
+
+        while frontier_source and frontier_target:
+
+            if len(frontier_source) <= len(frontier_target):
+                frontier, parents, depth = frontier_source, parents_source, depth_source
+                other_depth = depth_target
+            else:
+                frontier, parents, depth = frontier_target, parents_target, depth_target
+                other_depth = depth_source
+
+            next_frontier = []
+            meeting = None
+            best = None
+            expanded += len(frontier)
+            for p in frontier:
+                next_depth = depth[p] + 1
+                for m in person_movies[person_offsets[p]:person_offsets[p + 1]]:
+                    stars = movie_people[movie_offsets[m]:movie_offsets[m + 1]]
+                    edges += len(stars)
+                    for q in stars:
+                        if q in parents:
+                            continue
+                        parents[q] = (m, p)
+                        depth[q] = next_depth
+                        if q in other_depth:
+                            length = next_depth + other_depth[q]
+                            if best is None or length < best:
+                                best = length
+                                meeting = q
+                        next_frontier.append(q)
+
+            if meeting is not None:
+                count_expansion(stats, expanded, edges)
+                return join_index_paths(parents_source, parents_target, s, t, meeting)
+
+            if frontier is frontier_source:
+                frontier_source = next_frontier
+            else:
+                frontier_target = next_frontier
+
+        count_expansion(stats, expanded, edges)
+        return None
+
+    def label_components(self):
+        """
+        Returns, for every person index, the smallest person index in
+        its connected component.
+        """
+        labels = array("i", [-1]) * self.num_people()
+        seen_movies = bytearray(self.num_movies())
+        for s in range(self.num_people()):
+            if labels[s] != -1:
+                continue
+            labels[s] = s
+            stack = [s]
+            while stack:
+                p = stack.pop()
+                for m in self.movies_of(p):
+                    if seen_movies[m]:
+                        continue
+                    seen_movies[m] = 1
+                    for q in self.stars_of(m):
+                        if labels[q] == -1:
+                            labels[q] = s
+                            stack.append(q)
+        return labels
+
+    def bfs_tree(self, s, targets=None):
+        """
+        Breadth-first search from person index `s`.
+
+        Returns a backtrack dict in the `degrees.get_path` format,
+        mapping each reached person to (movie, previous person). When
+        `targets` is given the search stops once all of them are reached.
+        """
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+
+        backtrack = {s: None}
+        remaining = None if targets is None else set(targets) - {s}
+        frontier = [s]
+        while frontier and remaining != set():
+            next_frontier = []
+            for p in frontier:
+                for m in person_movies[person_offsets[p]:person_offsets[p + 1]]:
+                    for q in movie_people[movie_offsets[m]:movie_offsets[m + 1]]:
+                        if q in backtrack:
+                            continue
+                        backtrack[q] = (m, p)
+                        next_frontier.append(q)
+                        if remaining is not None:
+                            remaining.discard(q)
+            frontier = next_frontier
+        return backtrack
+
+
+class PeopleTable(Mapping):
+    """
+    Read-only view of a Graph shaped like `degrees.people`:
+    person_id -> {"name", "birth", "movies"}, built on each access.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        graph = self.graph
+        p = graph.person_index[person_id]
+        return {
+            "name": graph.person_names[p],
+            "birth": graph.person_births[p],
+            "movies": {graph.movie_ids[m] for m in graph.movies_of(p)},
+        }
+
+    def __contains__(self, person_id):
+        return person_id in self.graph.person_index
+
+    def __iter__(self):
+        return iter(self.graph.person_ids)
+
+    def __len__(self):
+        return self.graph.num_people()
+
+
+class MovieTable(Mapping):
+    """
+    Read-only view of a Graph shaped like `degrees.movies`:
+    movie_id -> {"title", "year", "stars"}, built on each access.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, movie_id):
+        graph = self.graph
+        m = graph.movie_index[movie_id]
+        return {
+            "title": graph.movie_titles[m],
+            "year": graph.movie_years[m],
+            "stars": {graph.person_ids[p] for p in graph.stars_of(m)},
+        }
+
+    def __contains__(self, movie_id):
+        return movie_id in self.graph.movie_index
+
+    def __iter__(self):
+        return iter(self.graph.movie_ids)
+
+    def __len__(self):
+        return self.graph.num_movies()
+
+
+class NameTable(Mapping):
+    """
+    Read-only view of a Graph shaped like `degrees.names`:
+    lowercase name -> set of person_ids.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, name):
+        return {self.graph.person_ids[p] for p in self.graph.names[name]}
+
+    def __iter__(self):
+        return iter(dict.fromkeys(name.lower() for name in self.graph.person_names))
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class ComponentTable(Mapping):
+    """
+    Read-only view of a Graph's component labels shaped like
+    `degrees.components`: person_id -> component label.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        return self.graph.components[self.graph.person_index[person_id]]
+
+    def __iter__(self):
+        return iter(self.graph.person_ids)
+
+    def __len__(self):
+        return self.graph.num_people()
+
+    def values(self):
+        return self.graph.components
+
+
+def count_components(labels):
+    """
+    Returns the number of connected components, the size of the largest
+    one and the number of people who share no movie with anyone, given
+    every person's component label.
+    """
+    sizes = Counter(labels)
+    return {
+        "components": len(sizes),
+        "largest": max(sizes.values(), default=0),
+        "isolated": sum(1 for size in sizes.values() if size == 1),
+    }
+
+
+def build_csr(num_people, num_movies, edges):
+    """
+    Turns a set of (person index, movie index) edges into CSR arrays
+    for both directions of the bipartite graph.
+    """
+    person_offsets = array("i", [0]) * (num_people + 1)
+    movie_offsets = array("i", [0]) * (num_movies + 1)
+    for p, m in edges:
+        person_offsets[p + 1] += 1
+        movie_offsets[m + 1] += 1
+    for i in range(num_people):
+        person_offsets[i + 1] += person_offsets[i]
+    for i in range(num_movies):
+        movie_offsets[i + 1] += movie_offsets[i]
+
+    person_movies = array("i", [0]) * len(edges)
+    movie_people = array("i", [0]) * len(edges)
+    person_fill = array("i", person_offsets[:-1])
+    movie_fill = array("i", movie_offsets[:-1])
+    for p, m in sorted(edges):
+        person_movies[person_fill[p]] = m
+        person_fill[p] += 1
+        movie_people[movie_fill[m]] = p
+        movie_fill[m] += 1
+
+    return person_offsets, person_movies, movie_offsets, movie_people
+
+
+def join_index_paths(parents_source, parents_target, s, t, meeting):
+    """
+    Joins the two halves of a bidirectional search at `meeting`.
+    """
+    path = []
+    p = meeting
+    while p != s:
+        m, previous = parents_source[p]
+        path.append((m, p))
+        p = previous
+    path.reverse()
+    p = meeting
+    while p != t:
+        m, p = parents_target[p]
+        path.append((m, p))
+    return path
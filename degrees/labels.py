@@ -0,0 +1,185 @@
+import os
+import pickle
+import sys
+import time
+
+from array import array
+
+import snapshot
+
+from util import count_expansion
+
+FILENAME = "degrees.labels"
+
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python labels.py directory")
+    directory = sys.argv[1]
+
+    import degrees
+    print("Loading data...")
+    degrees.load_data(directory)
+
+    start = time.perf_counter()
+    index = HubLabels.build(degrees.people, degrees.movies)
+    elapsed = time.perf_counter() - start
+    index.save(directory)
+
+    entries = index.num_entries()
+    print(f"Built hub labels in {elapsed:.2f}s: {entries} entries, "
+          f"{entries / max(1, len(index.labels)):.1f} per person, "
+          f"{os.path.getsize(labels_path(directory)) / 2 ** 20:.1f} MB on disk")
+
+
+class HubLabels():
+    """
+    Pruned 2-hop labeling of the person graph.
+
+    Every person stores a list of (hub, distance) pairs such that, for any
+    two connected people, some hub appears in both labels on a shortest
+    path between them. The exact degree of separation is then the minimum
+    of the summed distances over shared hubs.
+
+    labels[person_id] -> (array of hub ranks, array of distances),
+    sorted by hub rank.
+    """
+
+    def __init__(self, labels, sources=None):
+        self.labels = labels
+        self.sources = sources
+
+    @classmethod
+    def build(cls, people, movies):
+        """
+        Runs one pruned BFS per person, highest-degree people first, so
+        that well-connected people become hubs and later searches stop
+        wherever existing labels already give the distance.
+        """
+        def degree(person_id):
+            return sum(len(movies[movie]["stars"]) for movie in people[person_id]["movies"])
+
+        order = sorted(people, key=degree, reverse=True)
+        labels = {person_id: (array("i"), array("B")) for person_id in people}
+
+        for rank, root in enumerate(order):
+            root_hubs = dict(zip(*labels[root]))
+            visited = {root}
+            frontier = [root]
+            distance = 0
+            while frontier:
+                next_frontier = []
+                for person in frontier:
+
+                    # Skip people whose distance the labels already cover
+                    hubs, distances = labels[person]
+                    if any(root_hubs[hub] + d <= distance
+                           for hub, d in zip(hubs, distances)
+                           if hub in root_hubs):
+                        continue
+                    hubs.append(rank)
+                    distances.append(distance)
+
+                    for movie in people[person]["movies"]:
+                        for next_person in movies[movie]["stars"]:
+                            if next_person not in visited:
+                                visited.add(next_person)
+                                next_frontier.append(next_person)
+                frontier = next_frontier
+                distance += 1
+
+        return cls(labels)
+
+    def num_entries(self):
+        return sum(len(hubs) for hubs, _ in self.labels.values())
+
+    def hubs(self, person_id):
+        """
+        Returns the label of `person_id` as a dict of hub -> distance.
+        """
+        return dict(zip(*self.labels[person_id]))
+
+    def distance(self, source, target, target_hubs=None):
+        """
+        Returns the degrees of separation between two people,
+        or None if they are not connected.
+        """
+        if target_hubs is None:
+            target_hubs = self.hubs(target)
+        best = None
+        for hub, d in zip(*self.labels[source]):
+            if hub in target_hubs:
+                length = d + target_hubs[hub]
+                if best is None or length < best:
+                    best = length
+        return best
+
+    def shortest_path(self, source, target, neighbors_for_person, stats=None):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, or None.
+
+        Walks from `source`, each step moving to any neighbour one
+        degree closer to `target`, so no search is needed. If `stats` is
+        a dict, every person walked from counts as expanded and every
+        neighbour checked as an edge, as for the breadth-first searches.
+        """
+        target_hubs = self.hubs(target)
+        remaining = self.distance(source, target, target_hubs)
+        if remaining is None:
+            return None
+
+        path = []
+        person = source
+        expanded = 0
+        edges = 0
+        while remaining > 0:
+            expanded += 1
+            for movie, next_person in neighbors_for_person(person):
+                edges += 1
+                if self.distance(next_person, target, target_hubs) == remaining - 1:
+                    path.append((movie, next_person))
+                    person = next_person
+                    remaining -= 1
+                    break
+            else:
+                raise ValueError("hub labels do not match the loaded data")
+        count_expansion(stats, expanded, edges)
+        return path
+
+    def save(self, directory):
+        if self.sources is None:
+            self.sources = snapshot.fingerprint(directory)
+        with open(labels_path(directory), "wb") as f:
+            pickle.dump({
+                "sources": self.sources,
+                "labels": self.labels,
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def labels_path(directory):
+    return os.path.join(directory, FILENAME)
+
+
+def load_labels(directory):
+    """
+    Returns the saved HubLabels for `directory`, or None if there are
+    none or the CSVs changed since they were built. If the CSVs were
+    only touched, the labels are saved again with their new mtimes.
+    """
+    try:
+        with open(labels_path(directory), "rb") as f:
+            saved = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+    touched = snapshot.touched_sources(saved["sources"], directory)
+    if touched is None:
+        return None
+    labels = HubLabels(saved["labels"], saved["sources"])
+    if touched:
+        labels.save(directory)
+    return labels
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import unicodedata
+
+from bisect import bisect_left
+
+
+class NameIndex():
+    """
+    Sorted array of normalized names for exact, prefix and fuzzy lookup.
+
+    keys[i] is a normalized name and person_ids[i] the person it belongs
+    to; keys are sorted, so all names sharing a prefix are contiguous.
+    reversed_keys holds every key spelled backwards, also sorted, and
+    reversed_order[r] is the position in keys of reversed_keys[r].
+    person_ids and reversed_order may be any sequences, such as the
+    memory-mapped tables of a snapshot (see `snapshot.name_index`).
+    """
+
+    def __init__(self, keys, person_ids, reversed_keys, reversed_order):
+        self.keys = keys
+        self.person_ids = person_ids
+        self.reversed_keys = reversed_keys
+        self.reversed_order = reversed_order
+
+    @classmethod
+    def build(cls, entries):
+        """
+        Normalizes and sorts (name, person_id) pairs into an index.
+        """
+        entries = sorted((normalize(name), person_id) for name, person_id in entries)
+        keys = [key for key, _ in entries]
+        backwards = sorted((key[::-1], i) for i, key in enumerate(keys))
+        return cls(keys, [person_id for _, person_id in entries],
+                   [key for key, _ in backwards], [i for _, i in backwards])
+
+    @classmethod
+    def from_people(cls, people):
+        return cls.build((person["name"], person_id) for person_id, person in people.items())
+
+    @classmethod
+    def from_graph(cls, graph):
+        return cls.build(zip(graph.person_names, graph.person_ids))
+
+    def exact(self, name):
+        """
+        Returns the IDs of every person whose normalized name is `name`.
+        """
+        key = normalize(name)
+        lo = bisect_left(self.keys, key)
+        hi = lo
+        while hi < len(self.keys) and self.keys[hi] == key:
+            hi += 1
+        return self.person_ids[lo:hi]
+
+    def complete(self, prefix, limit=10):
+        """
+        Returns up to `limit` (name, person_id) pairs whose name starts
+        with `prefix`, in name order.
+        """
+        prefix = normalize(prefix)
+        lo = bisect_left(self.keys, prefix)
+        hi = min(bisect_left(self.keys, successor(prefix)) if prefix else len(self.keys),
+                 lo + limit)
+        return list(zip(self.keys[lo:hi], self.person_ids[lo:hi]))
+
+    def fuzzy(self, name, max_distance=1, limit=10):
+        """
+        Returns up to `limit` (distance, name, person_id) triples for names
+        within `max_distance` edits of `name`, closest first.
+
+        A name within k edits has at most k // 2 of them against the
+        first half of the query, or else at most k - k // 2 - 1 against
+        the second half. So the keys are walked twice with `walk`: forwards
+        allowing only k // 2 edits over the first half, and backwards,
+        through reversed_keys, allowing the rest over the second half.
+        Either way the full k is only allowed deep in the trie, where
+        few keys share each prefix.
+        """
+        query = normalize(name)
+        half = len(query) // 2
+        front = max_distance // 2
+        back = max_distance - front - 1
+
+        found = {}
+        for i, distance in walk(self.keys, query, max_distance, half - front, front):
+            found[i] = distance
+        if back >= 0:
+            for r, distance in walk(self.reversed_keys, query[::-1], max_distance,
+                                    len(query) - half - back, back):
+                found[self.reversed_order[r]] = distance
+
+        matches = sorted((distance, self.keys[i], self.person_ids[i])
+                         for i, distance in found.items())
+        return matches[:limit]
+
+
+def walk(keys, query, max_distance, shallow_depth, shallow_distance):
+    """
+    Yields (index, distance) for every key in the sorted list `keys`
+    within `max_distance` edits of `query`, and within `shallow_distance`
+    edits of some prefix of the query over its first `shallow_depth`
+    characters.
+
+    Walks the sorted keys as if they were a trie: one edit-distance row
+    per character, shared with the previous key's common prefix, and
+    skipping every key under a prefix once no row entry is within the
+    distance allowed at that depth. Once a prefix has used up all
+    `max_distance` edits, its possible matches are looked up directly.
+    """
+    rows = [[min(j, max_distance + 1) for j in range(len(query) + 1)]]
+    previous = ""
+    i = 0
+    while i < len(keys):
+        key = keys[i]
+
+        # Reuse the rows for the prefix shared with the previous key
+        common = 0
+        limit_common = min(len(key), len(previous), len(rows) - 1)
+        while common < limit_common and key[common] == previous[common]:
+            common += 1
+        del rows[common + 1:]
+
+        pruned = None
+        for depth in range(common, len(key)):
+            row = next_row(rows[-1], query, key[depth], depth + 1, max_distance)
+            rows.append(row)
+            allowed = shallow_distance if depth < shallow_depth else max_distance
+            lowest = min(row)
+            if lowest > allowed:
+                pruned = key[:depth + 1]
+                break
+
+            # With every edit spent, a key under this prefix can only
+            # match by continuing with exactly the rest of the query
+            if lowest == max_distance:
+                pruned = key[:depth + 1]
+                for j, distance in enumerate(row):
+                    if distance == max_distance:
+                        candidate = pruned + query[j:]
+                        match = bisect_left(keys, candidate, i)
+                        while match < len(keys) and keys[match] == candidate:
+                            yield match, max_distance
+                            match += 1
+                break
+
+        if pruned is not None:
+            previous = pruned
+            i = bisect_left(keys, successor(pruned), i + 1)
+            continue
+
+        if rows[-1][-1] <= max_distance:
+            yield i, rows[-1][-1]
+        previous = key
+        i += 1
+
+
+def normalize(name):
+    """
+    Case-folds `name`, strips accents and collapses whitespace.
+    """
+    decomposed = unicodedata.normalize("NFKD", name.casefold())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.split())
+
+
+def successor(prefix):
+    """
+    Returns the smallest string greater than every string starting
+    with `prefix`.
+    """
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def next_row(row, query, c, i, max_distance):
+    """
+    Extends a Levenshtein DP row against `query` by character `c`, the
+    i-th of the key.
+
+    Only the band |i - j| <= max_distance is computed; every other cell
+    is capped at max_distance + 1, which is all a bounded search needs.
+    """
+    cap = max_distance + 1
+    new = [cap] * len(row)
+    if i < cap:
+        new[0] = i
+    for j in range(max(1, i - max_distance), min(len(row) - 1, i + max_distance) + 1):
+        cost = 0 if query[j - 1] == c else 1
+        new[j] = min(new[j - 1] + 1, row[j] + 1, row[j - 1] + cost, cap)
+    return new
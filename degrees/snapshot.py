@@ -0,0 +1,373 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+
+from array import array
+from bisect import bisect_left, bisect_right
+
+from graph import Graph, count_components
+from lookup import NameIndex
+
+MAGIC = b"DEGSNAP\x04"
+SOURCES = ["people.csv", "movies.csv", "stars.csv"]
+FILENAME = "degrees.snapshot"
+
+# Sections are aligned so every array can be cast in place
+ALIGNMENT = 8
+
+# Spare bytes after the JSON header, so recorded mtimes can be
+# rewritten in place without moving the sections
+HEADER_SLACK = 64
+
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python snapshot.py directory")
+    directory = sys.argv[1]
+
+    start = time.perf_counter()
+    path = compile_snapshot(directory)
+    print(f"Compiled {path} in {time.perf_counter() - start:.2f}s "
+          f"({os.path.getsize(path) / 2 ** 20:.1f} MB)")
+
+    start = time.perf_counter()
+    graph = open_snapshot(path)
+    print(f"Mapped {graph.num_people()} people and {graph.num_movies()} movies "
+          f"in {1000 * (time.perf_counter() - start):.2f}ms")
+
+
+class StringTable():
+    """
+    Read-only sequence of strings stored as one UTF-8 blob plus
+    an array of end offsets.
+    """
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class IndexedTable():
+    """
+    Read-only sequence whose i-th item is table[order[i]].
+    """
+
+    def __init__(self, table, order):
+        self.table = table
+        self.order = order
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.table[j] for j in self.order[i]]
+        return self.table[self.order[i]]
+
+
+class SortedIndex():
+    """
+    Maps keys to table positions by binary search over `order`,
+    a permutation of the table sorted by key.
+
+    With `unique=True` lookups return one position, otherwise the list
+    of every position sharing the key.
+    """
+
+    def __init__(self, table, order, unique=True, lower=False):
+        self.table = table
+        self.order = order
+        self.unique = unique
+        self.lower = lower
+
+    def key(self, i):
+        key = self.table[i]
+        return key.lower() if self.lower else key
+
+    def span(self, key):
+        lo = bisect_left(self.order, key, key=self.key)
+        hi = bisect_right(self.order, key, lo=lo, key=self.key)
+        return lo, hi
+
+    def get(self, key, default=None):
+        lo, hi = self.span(key)
+        if lo == hi:
+            return default
+        if self.unique:
+            return self.order[lo]
+        return list(self.order[lo:hi])
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        lo, hi = self.span(key)
+        return lo != hi
+
+
+def snapshot_path(directory):
+    return os.path.join(directory, FILENAME)
+
+
+def load(directory):
+    """
+    Returns a Graph for `directory`, memory-mapping its snapshot and
+    recompiling it first if it is missing or out of date.
+    """
+    path = snapshot_path(directory)
+    if not is_fresh(path, directory):
+        compile_snapshot(directory)
+    return open_snapshot(path)
+
+
+def compile_snapshot(directory):
+    """
+    Parse the CSVs in `directory` once and write them as a snapshot.
+    """
+    graph = Graph.from_csv(directory)
+    path = snapshot_path(directory)
+    write_snapshot(graph, fingerprint(directory), path)
+    return path
+
+
+def fingerprint(directory, hashes=True):
+    """
+    Returns size, mtime and (optionally) SHA-256 of each source CSV.
+    """
+    sources = {}
+    for name in SOURCES:
+        stat = os.stat(os.path.join(directory, name))
+        sources[name] = {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+        if hashes:
+            sources[name]["sha256"] = file_hash(os.path.join(directory, name))
+    return sources
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_fresh(path, directory):
+    """
+    A snapshot is fresh when every source has the recorded size and either
+    the recorded mtime or, if it was touched, the recorded hash. The new
+    mtimes of touched sources are written back, so they are hashed once.
+    """
+    try:
+        header, _ = read_header(path)
+    except (OSError, ValueError):
+        return False
+    if header["byteorder"] != sys.byteorder:
+        return False
+    touched = touched_sources(header["sources"], directory)
+    if touched is None:
+        return False
+    if touched:
+        return rewrite_header(path, header)
+    return True
+
+
+def touched_sources(sources, directory):
+    """
+    Compares the CSVs in `directory` to a recorded `fingerprint`.
+
+    Returns None if any of them changed. Otherwise returns the names of
+    the ones whose mtime changed but whose hash still matches, updating
+    their recorded mtime in `sources` so the caller can save it.
+    """
+    try:
+        current = fingerprint(directory, hashes=False)
+    except OSError:
+        return None
+    touched = []
+    for name, recorded in sources.items():
+        if current[name]["size"] != recorded["size"]:
+            return None
+        if current[name]["mtime"] != recorded["mtime"]:
+            if file_hash(os.path.join(directory, name)) != recorded["sha256"]:
+                return None
+            recorded["mtime"] = current[name]["mtime"]
+            touched.append(name)
+    return touched
+
+
+def write_snapshot(graph, sources, path):
+    """
+    Write `graph` to `path`: a JSON header describing each section
+    followed by the raw, aligned section bytes.
+    """
+    n = graph.num_people()
+    sections = {
+        "person_offsets": graph.person_offsets,
+        "person_movies": graph.person_movies,
+        "movie_offsets": graph.movie_offsets,
+        "movie_people": graph.movie_people,
+        "person_id_order": array("i", sorted(range(n), key=graph.person_ids.__getitem__)),
+        "movie_id_order": array("i", sorted(range(graph.num_movies()),
+                                            key=graph.movie_ids.__getitem__)),
+        "name_order": array("i", sorted(range(n), key=lambda i: graph.person_names[i].lower())),
+        "components": (graph.label_components() if graph.components is None
+                       else array("i", graph.components)),
+    }
+    for name in ["person_ids", "person_names", "person_births",
+                 "movie_ids", "movie_titles", "movie_years"]:
+        blob, offsets = encode_strings(getattr(graph, name))
+        sections[f"{name}_blob"] = blob
+        sections[f"{name}_offsets"] = offsets
+
+    # The fuzzy name index, by person index. Normalized keys hold no
+    # newlines, so they are stored newline-separated and split in one go
+    index = NameIndex.build(zip(graph.person_names, range(n)))
+    sections["name_keys"] = "\n".join(index.keys).encode("utf-8")
+    sections["name_people"] = array("i", index.person_ids)
+    sections["name_reversed_keys"] = "\n".join(index.reversed_keys).encode("utf-8")
+    sections["name_reversed_order"] = array("i", index.reversed_order)
+
+    layout = {}
+    position = 0
+    for name, data in sections.items():
+        typecode = data.typecode if isinstance(data, array) else "B"
+        size = len(data) * (data.itemsize if isinstance(data, array) else 1)
+        layout[name] = [position, size, typecode]
+        position = align(position + size)
+
+    # Component counts go in the header, so startup need not pass over
+    # every label to report them
+    header = json.dumps({
+        "byteorder": sys.byteorder,
+        "sources": sources,
+        "components": count_components(sections["components"]),
+        "sections": layout,
+    }).encode("utf-8") + b" " * HEADER_SLACK
+    start = align(len(MAGIC) + 4 + len(header))
+
+    # Write beside the target and rename, so readers never see half a file
+    partial = f"{path}.tmp"
+    with open(partial, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        for name, data in sections.items():
+            f.seek(start + layout[name][0])
+            f.write(data.tobytes() if isinstance(data, array) else data)
+        f.truncate(start + position)
+    os.replace(partial, path)
+
+
+def encode_strings(strings):
+    offsets = array("q", [0])
+    blob = bytearray()
+    for string in strings:
+        blob += string.encode("utf-8")
+        offsets.append(len(blob))
+    return bytes(blob), offsets
+
+
+def align(position):
+    return (position + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def read_header(path):
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a degrees snapshot")
+        length, = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(length))
+    return header, align(len(MAGIC) + 4 + length)
+
+
+def rewrite_header(path, header):
+    """
+    Overwrite the JSON header of a snapshot in place, padding it to the
+    length of the old one. Returns False if the new header does not fit.
+    """
+    encoded = json.dumps(header).encode("utf-8")
+    with open(path, "r+b") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            return False
+        length, = struct.unpack("<I", f.read(4))
+        if len(encoded) > length:
+            return False
+        f.write(encoded.ljust(length))
+    return True
+
+
+def open_snapshot(path):
+    """
+    Memory-map a snapshot and return a Graph whose arrays are views
+    into the mapping, so nothing is parsed or copied up front and
+    processes mapping the same file share its pages.
+    """
+    header, start = read_header(path)
+    with open(path, "rb") as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapping)
+
+    sections = {}
+    for name, (offset, size, typecode) in header["sections"].items():
+        sections[name] = view[start + offset:start + offset + size].cast(typecode)
+
+    def strings(name):
+        return StringTable(sections[f"{name}_blob"], sections[f"{name}_offsets"])
+
+    person_ids = strings("person_ids")
+    person_names = strings("person_names")
+    movie_ids = strings("movie_ids")
+    graph = Graph(
+        person_ids, person_names, strings("person_births"),
+        movie_ids, strings("movie_titles"), strings("movie_years"),
+        sections["person_offsets"], sections["person_movies"],
+        sections["movie_offsets"], sections["movie_people"],
+        person_index=SortedIndex(person_ids, sections["person_id_order"]),
+        movie_index=SortedIndex(movie_ids, sections["movie_id_order"]),
+        names=SortedIndex(person_names, sections["name_order"], unique=False, lower=True),
+        components=sections["components"],
+    )
+    graph.mapping = mapping
+    graph.sections = sections
+    graph.component_stats = header["components"]
+    return graph
+
+
+def name_index(graph):
+    """
+    Returns the `lookup.NameIndex` stored in the snapshot `graph` was
+    opened from. Only the two key lists are decoded, which takes
+    milliseconds where building the index takes seconds.
+    """
+    sections = graph.sections
+
+    def lines(name):
+        if len(sections["name_people"]) == 0:
+            return []
+        return str(sections[name], "utf-8").split("\n")
+
+    return NameIndex(lines("name_keys"), IndexedTable(graph.person_ids, sections["name_people"]),
+                     lines("name_reversed_keys"), sections["name_reversed_order"])
+
+
+if __name__ == "__main__":
+    main()
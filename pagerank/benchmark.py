@@ -0,0 +1,163 @@
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import engine
+import outofcore
+import pagerank
+import parallel
+import solvers
+
+from engine import Transition
+
+KINDS = ["erdos-renyi", "power-law", "dangling"]
+SIZES = [10 ** 2, 10 ** 4, 10 ** 6]
+ENGINES = ["sample", "iterate", "sparse", "parallel", "monte-carlo",
+           "gauss-seidel", "aitken", "quadratic", "adaptive", "outofcore"]
+
+AVERAGE_DEGREE = 8
+DANGLING_FRACTION = 0.5
+SEED = 50
+
+# The pure-Python engines are skipped above these sizes
+LIMITS = {"iterate": 2000, "sample": 10 ** 5}
+
+# Visits per page for the vectorized Monte Carlo engine
+VISITS_PER_PAGE = 100
+
+# The reference solution iterates far past the engines' tolerance
+REFERENCE_TOLERANCE = 1e-14
+
+
+def main():
+    if len(sys.argv) == 6 and sys.argv[1] == "--run":
+        kind, n, name, output = sys.argv[2], int(sys.argv[3]), sys.argv[4], sys.argv[5]
+        print(json.dumps(run_engine(kind, n, name, output)))
+        return
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python benchmark.py [size,...] [engine,...]")
+    sizes = [int(float(size)) for size in sys.argv[1].split(",")] if len(sys.argv) >= 2 else SIZES
+    engines = sys.argv[2].split(",") if len(sys.argv) == 3 else ENGINES
+
+    print(f"{'graph':<12} {'pages':>9} {'engine':<13} {'seconds':>9} "
+          f"{'peak MB':>9} {'iterations':>10} {'L1 error':>10}")
+    for kind in KINDS:
+        for n in sizes:
+            # Every engine, and the reference, runs in its own process:
+            # a child inherits its parent's peak RSS, so the parent stays small
+            with tempfile.TemporaryDirectory() as scratch:
+                output = os.path.join(scratch, "rank.npy")
+                launch(kind, n, "reference", output)
+                reference = np.load(output)
+                for name in engines:
+                    if n > LIMITS.get(name, n):
+                        continue
+                    report = launch(kind, n, name, output)
+                    error = np.abs(np.load(output) - reference).sum()
+                    iterations = report["iterations"] if report["iterations"] is not None else "-"
+                    print(f"{kind:<12} {n:>9} {name:<13} {report['seconds']:>9.3f} "
+                          f"{report['peak_mb']:>9.1f} {iterations:>10} {error:>10.2e}")
+
+
+def launch(kind, n, name, output):
+    """
+    Run `run_engine` in a fresh Python process and return its report.
+    """
+    return json.loads(subprocess.run(
+        [sys.executable, __file__, "--run", kind, str(n), name, output],
+        capture_output=True, text=True, check=True
+    ).stdout)
+
+
+def generate(kind, n, average_degree=AVERAGE_DEGREE, seed=SEED):
+    """
+    Returns (sources, targets) link arrays of a synthetic corpus of `n`
+    pages, without self-links or duplicate links.
+
+        erdos-renyi  every link joins two uniformly random pages
+        power-law    page i links to earlier pages, picking page
+                     floor(i * u ** 2) for uniform u; in-degrees then
+                     follow the k ** -3 tail of Barabasi-Albert graphs
+        dangling     erdos-renyi with DANGLING_FRACTION of pages stripped
+                     of all their links
+    """
+    rng = np.random.default_rng(seed)
+    links = n * average_degree
+    if kind == "power-law":
+        sources = np.repeat(np.arange(1, n, dtype=np.int64), average_degree)
+        targets = (sources * rng.random(len(sources)) ** 2).astype(np.int64)
+    else:
+        sources = rng.integers(n, size=links)
+        targets = rng.integers(n, size=links)
+        if kind == "dangling":
+            keep = rng.random(n) >= DANGLING_FRACTION
+            targets = targets[keep[sources]]
+            sources = sources[keep[sources]]
+
+    pairs = np.unique(sources * n + targets)
+    sources, targets = pairs // n, pairs % n
+    distinct = sources != targets
+    return sources[distinct], targets[distinct]
+
+
+def run_engine(kind, n, name, output):
+    """
+    Run one engine on a generated graph, save its rank vector to `output`
+    and report wall time, peak RSS (input included) and iterations used.
+    """
+    sources, targets = generate(kind, n)
+    iterations = None
+    with tempfile.TemporaryDirectory() as scratch:
+        if name in ["iterate", "sample"]:
+            corpus = {page: set() for page in range(n)}
+            for source, target in zip(sources.tolist(), targets.tolist()):
+                corpus[source].add(target)
+        elif name == "outofcore":
+            outofcore.save_edges(scratch, range(n), sources, targets)
+        else:
+            transition = Transition(range(n), sources, targets)
+        del sources, targets
+
+        start = time.perf_counter()
+        if name == "iterate":
+            ranks = pagerank.iterate_pagerank(corpus, pagerank.DAMPING)
+            rank = np.array([ranks[page] for page in range(n)])
+        elif name == "sample":
+            ranks = pagerank.sample_pagerank(corpus, pagerank.DAMPING, pagerank.SAMPLES)
+            rank = np.array([ranks[page] for page in range(n)])
+        elif name == "sparse":
+            rank, iterations = engine.power_iteration(transition, pagerank.DAMPING)
+        elif name == "parallel":
+            rank, iterations = parallel.parallel_pagerank(transition, pagerank.DAMPING)
+        elif name == "reference":
+            rank, iterations = engine.power_iteration(transition, pagerank.DAMPING,
+                                                      tolerance=REFERENCE_TOLERANCE)
+        elif name == "monte-carlo":
+            rank, _, _ = engine.monte_carlo(transition, pagerank.DAMPING, VISITS_PER_PAGE * n)
+        elif name == "outofcore":
+            rank, iterations = outofcore.outofcore_pagerank(scratch, pagerank.DAMPING)
+        else:
+            solution = solvers.solve(transition, pagerank.DAMPING, name)
+            rank, iterations = solution.rank, solution.iterations
+        seconds = time.perf_counter() - start
+        peak_mb = peak_rss() / 1024
+
+    np.save(output, rank)
+    return {"seconds": seconds, "peak_mb": peak_mb, "iterations": iterations}
+
+
+def peak_rss():
+    """
+    Returns the peak resident set size of this process in KiB.
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+if __name__ == "__main__":
+    main()
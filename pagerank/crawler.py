@@ -0,0 +1,110 @@
+import multiprocessing
+import os
+import re
+import sys
+
+from array import array
+
+# Characters read from a file at a time
+CHUNK_SIZE = 1 << 16
+
+HREF = re.compile(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+# Everything up to the end of the last match of HREF
+LAST_HREF = re.compile(r"(?s:.*)" + HREF.pattern)
+
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python crawler.py corpus")
+    pages, sources, targets = crawl_edges(sys.argv[1])
+    print(f"{len(pages)} pages, {len(sources)} links")
+
+
+def scan_links(path, chunk_size=CHUNK_SIZE):
+    """
+    Returns the set of hrefs in the HTML file at `path`, reading it in
+    chunks instead of all at once.
+
+    Text from the first '<a' after the last match that more text could
+    still turn into a match is carried into the next chunk, so a link
+    split across chunks is still matched whole, even one whose href
+    holds a '>'.
+    """
+    links = set()
+    pending = ""
+    with open(path) as f:
+        for chunk in iter(lambda: f.read(chunk_size), ""):
+            buffer = pending + chunk
+            cut = unmatched_start(buffer)
+            links.update(HREF.findall(buffer, 0, cut))
+            pending = buffer[cut:]
+    links.update(HREF.findall(pending))
+    return links
+
+
+def unmatched_start(buffer):
+    """
+    Returns the position of the first '<a' after the last match of HREF
+    in `buffer` that could still begin a match once more text follows,
+    or the end of `buffer` if there is none. Such a tag is one that a
+    closing ' href=""' would complete.
+    """
+    position = buffer.rfind("<a")
+    if position != -1:
+        last = LAST_HREF.match(buffer)
+        position = buffer.find("<a", last.end() if last else 0)
+    while position != -1:
+        if HREF.match(buffer[position:] + ' href=""'):
+            return position
+        position = buffer.find("<a", position + 1)
+    # A '<' ending the chunk may be the start of an '<a'
+    return len(buffer) - 1 if buffer.endswith("<") else len(buffer)
+
+
+def scan_file(args):
+    directory, filename = args
+    return filename, scan_links(os.path.join(directory, filename))
+
+
+def crawl_edges(directory, processes=None):
+    """
+    Parse a directory of HTML pages on a pool of processes.
+
+    Returns (pages, sources, targets): page names sorted by name, and
+    parallel integer arrays with one entry per link from page
+    sources[i] to page targets[i]. Self-links and links leaving the
+    corpus are dropped, as in `pagerank.crawl`.
+    """
+    pages = sorted(filename for filename in os.listdir(directory)
+                   if filename.endswith(".html"))
+    index = {page: i for i, page in enumerate(pages)}
+
+    sources = array("i")
+    targets = array("i")
+    tasks = [(directory, page) for page in pages]
+    chunksize = max(1, len(tasks) // (4 * (processes or os.cpu_count() or 1)))
+    with multiprocessing.Pool(processes) as pool:
+        for page, links in pool.imap(scan_file, tasks, chunksize):
+            source = index[page]
+            for link in sorted(links):
+                target = index.get(link)
+                if target is not None and target != source:
+                    sources.append(source)
+                    targets.append(target)
+
+    return pages, sources, targets
+
+
+def edges_to_corpus(pages, sources, targets):
+    """
+    Convert an edge list back to the dict of sets `pagerank.crawl` returns.
+    """
+    corpus = {page: set() for page in pages}
+    for source, target in zip(sources, targets):
+        corpus[pages[source]].add(pages[target])
+    return corpus
+
+
+if __name__ == "__main__":
+    main()
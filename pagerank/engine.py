@@ -0,0 +1,238 @@
+import math
+import sys
+
+import numpy as np
+import scipy.sparse
+import scipy.stats
+
+from crawler import crawl_edges
+from pagerank import DAMPING, SAMPLES
+
+# Stop once the L1 change between iterations drops below this
+TOLERANCE = 1e-10
+MAX_ITERATIONS = 1000
+
+# Monte Carlo: surfers advanced together, and independent batches of
+# surfers used to estimate confidence intervals
+WALKERS = 1024
+BATCHES = 8
+
+# Surfers walk uncounted until their distribution is within this (in L1)
+# of the stationary one; every step shrinks the gap by the damping factor
+BURN_IN_TOLERANCE = 1e-4
+
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python engine.py corpus")
+    transition = Transition(*crawl_edges(sys.argv[1]))
+    estimate, half_width, samples = monte_carlo(transition, DAMPING, SAMPLES)
+    print(f"PageRank Results from Vectorized Sampling (n = {samples})")
+    for i in np.argsort(transition.pages):
+        print(f"  {transition.pages[i]}: {estimate[i]:.4f} ± {half_width[i]:.4f}")
+
+    rank, iterations = power_iteration(transition, DAMPING)
+    ranks = transition.ranks(rank)
+    print(f"PageRank Results from Sparse Iteration ({iterations} iterations)")
+    for page in sorted(ranks):
+        print(f"  {page}: {ranks[page]:.4f}")
+
+
+class Transition():
+    """
+    Link structure of a corpus as a column-stochastic sparse matrix.
+
+    Pages are numbered by their position in `pages`. matrix[j, i] is
+    1 / out_degree[i] when page i links to page j, so `matrix @ rank`
+    spreads every page's rank evenly over its links. Dangling pages
+    (no links) have empty columns and are handled separately.
+    """
+
+    def __init__(self, pages, sources, targets):
+        # A range of page numbers is kept as is for very large graphs
+        self.pages = pages if isinstance(pages, range) else list(pages)
+        self.page_index = None
+        self.n = len(self.pages)
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        self.out_degree = np.bincount(sources, minlength=self.n)
+        self.dangling = self.out_degree == 0
+        weights = 1 / self.out_degree[sources]
+        self.matrix = scipy.sparse.csr_matrix(
+            (weights, (targets, sources)), shape=(self.n, self.n)
+        )
+
+        # Outgoing links in CSR form: links of page i are
+        # link_targets[link_offsets[i]:link_offsets[i + 1]]
+        self.link_offsets = np.zeros(self.n + 1, dtype=np.int64)
+        np.cumsum(self.out_degree, out=self.link_offsets[1:])
+        self.link_targets = targets[np.argsort(sources, kind="stable")]
+
+    @property
+    def index(self):
+        """
+        Map of page -> position, built on first use.
+        """
+        if self.page_index is None:
+            self.page_index = {page: i for i, page in enumerate(self.pages)}
+        return self.page_index
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Build the transition structure from the dict `crawl` returns.
+        """
+        pages = list(corpus)
+        index = {page: i for i, page in enumerate(pages)}
+        sources = []
+        targets = []
+        for page, links in corpus.items():
+            for link in links:
+                sources.append(index[page])
+                targets.append(index[link])
+        return cls(pages, sources, targets)
+
+    def step(self, rank, damping_factor):
+        """
+        One power-iteration step. Rank on dangling pages is spread over
+        every page, which adds the same constant to each entry.
+        """
+        constant = (1 - damping_factor + damping_factor * rank[self.dangling].sum()) / self.n
+        return damping_factor * (self.matrix @ rank) + constant
+
+    def ranks(self, rank):
+        """
+        Return a rank vector as a dict of page -> PageRank.
+        """
+        return {page: float(rank[i]) for i, page in enumerate(self.pages)}
+
+
+def power_iteration(transition, damping_factor, start=None,
+                    tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+    """
+    Iterate from `start` (uniform by default) until the L1 change is
+    below `tolerance`. Returns the rank vector and the iterations used.
+    """
+    if start is None:
+        rank = np.full(transition.n, 1 / transition.n)
+    else:
+        rank = np.asarray(start, dtype=np.float64)
+    for iteration in range(1, max_iterations + 1):
+        new_rank = transition.step(rank, damping_factor)
+        change = np.abs(new_rank - rank).sum()
+        rank = new_rank
+        if change < tolerance:
+            break
+    return rank, iteration
+
+
+def monte_carlo(transition, damping_factor, samples, walkers=WALKERS,
+                batches=BATCHES, ci_width=None, check_every=100, rng=None,
+                burn_in=None):
+    """
+    Estimate PageRank by advancing `walkers` random surfers at once.
+
+    Surfers start on uniformly random pages and first take `burn_in`
+    uncounted steps (by default enough for BURN_IN_TOLERANCE), so that
+    the few steps each surfer gets do not favor where it started. Visits
+    are then counted separately for `batches` groups of surfers, whose
+    spread gives a 95% confidence interval per page.
+
+    Stops after about `samples` visits in total, or earlier once every
+    interval is narrower than `ci_width`. Returns the estimates, the
+    interval half-widths and the number of visits counted.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    if burn_in is None:
+        burn_in = burn_in_steps(damping_factor)
+    n = transition.n
+    walkers = max(batches, walkers - walkers % batches)
+    batch = np.repeat(np.arange(batches), walkers // batches) * n
+
+    positions = rng.integers(n, size=walkers)
+    for _ in range(burn_in):
+        positions = surf(transition, positions, damping_factor, rng)
+
+    # Visits are buffered for `check_every` steps and added to `counts`
+    # at once, so a step costs O(walkers) however many pages there are
+    counts = np.zeros(batches * n, dtype=np.int64)
+    visits = np.empty((check_every, walkers), dtype=np.int64)
+    steps = max(1, -(-samples // walkers))
+    for step in range(1, steps + 1):
+        visits[(step - 1) % check_every] = batch + positions
+        positions = surf(transition, positions, damping_factor, rng)
+
+        if step % check_every == 0 or step == steps:
+            np.add.at(counts, visits[:(step - 1) % check_every + 1].ravel(), 1)
+            if ci_width is not None:
+                _, half_width = batch_estimates(counts, batches, n, step * walkers)
+                if 2 * half_width.max() < ci_width:
+                    break
+
+    estimate, half_width = batch_estimates(counts, batches, n, step * walkers)
+    return estimate, half_width, step * walkers
+
+
+def burn_in_steps(damping_factor, tolerance=BURN_IN_TOLERANCE):
+    """
+    Steps after which surfers from any start are within `tolerance` of
+    the stationary distribution: the gap shrinks by `damping_factor`
+    per step, since every teleport forgets the start.
+    """
+    if damping_factor <= 0:
+        return 0
+    return math.ceil(math.log(tolerance) / math.log(damping_factor))
+
+
+def surf(transition, positions, damping_factor, rng):
+    """
+    Move every surfer one step. Each draws one uniform number: below
+    the damping factor a surfer on a page with links follows the link
+    the rescaled draw selects, otherwise it jumps to a random page.
+    """
+    draws = rng.random(len(positions))
+    degree = transition.out_degree[positions]
+    follow = (draws < damping_factor) & (degree > 0)
+    choice = np.minimum((draws[follow] / damping_factor * degree[follow]).astype(np.int64),
+                        degree[follow] - 1)
+    positions = positions.copy()
+    positions[follow] = transition.link_targets[transition.link_offsets[positions[follow]] + choice]
+    positions[~follow] = rng.integers(transition.n, size=len(positions) - follow.sum())
+    return positions
+
+
+def batch_estimates(counts, batches, n, samples):
+    """
+    Mean visit frequency over batches and its 95% confidence half-width,
+    using Student's t since there are only a few batches.
+    """
+    frequencies = counts.reshape(batches, n) / (samples / batches)
+    estimate = frequencies.mean(axis=0)
+    t = scipy.stats.t.ppf(0.975, batches - 1)
+    half_width = t * frequencies.std(axis=0, ddof=1) / np.sqrt(batches)
+    return estimate, half_width
+
+
+def sample_pagerank(corpus, damping_factor, n):
+    """
+    Vectorized version of `pagerank.sample_pagerank`, returning the
+    same dictionary of page -> estimated PageRank.
+    """
+    transition = Transition.from_corpus(corpus)
+    estimate, _, _ = monte_carlo(transition, damping_factor, n)
+    return transition.ranks(estimate)
+
+
+def iterate_pagerank(corpus, damping_factor):
+    """
+    Sparse-matrix version of `pagerank.iterate_pagerank`, returning the
+    same dictionary of page -> PageRank.
+    """
+    transition = Transition.from_corpus(corpus)
+    rank, _ = power_iteration(transition, damping_factor)
+    return transition.ranks(rank)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+import os
+import sys
+
+import numpy as np
+
+from crawler import crawl_edges, edges_to_corpus
+from engine import TOLERANCE, Transition, power_iteration
+from pagerank import DAMPING
+
+FILENAME = "pagerank.state.npz"
+
+# Forward push hands over to power iteration once more than this fraction
+# of pages need a push: by then a sweep over every page costs about as much
+PUSH_FRACTION = 0.2
+
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python incremental.py corpus")
+    directory = sys.argv[1]
+
+    pages, sources, targets = crawl_edges(directory)
+    transition = Transition(pages, sources, targets)
+    state = load_state(directory)
+    if state is None:
+        print("No saved ranks, starting from uniform.")
+        rank, iterations = power_iteration(transition, DAMPING)
+        print(f"Converged in {iterations} iterations.")
+    else:
+        delta = diff_edges(state, (pages, sources, targets))
+        added, removed, changed = delta
+        print(f"{len(added)} pages added, {len(removed)} removed, "
+              f"{len(changed)} with changed links.")
+        rank, pushes, iterations = update_pagerank(transition, state, delta, DAMPING)
+        print(f"Updated with {pushes} pushes and {iterations} iterations.")
+
+    save_state(directory, pages, sources, targets, rank)
+    ranks = transition.ranks(rank)
+    for page in sorted(ranks):
+        print(f"  {page}: {ranks[page]:.4f}")
+
+
+def update_pagerank(transition, old, delta, damping_factor, tolerance=TOLERANCE,
+                    max_active=PUSH_FRACTION):
+    """
+    Update the saved ranks in `old` (a state dict, as `load_state`
+    returns) to the corpus of `transition`, given the `delta` from
+    `diff_edges`. Returns the rank vector, the pushes and the power
+    iterations used.
+
+    The old ranks still balance every page's inflow except where links
+    changed, so the residual starts out nonzero only at the old and new
+    link targets of changed and removed pages (the rank those pages send
+    now minus what they used to send) and at new pages. Each round then
+    pushes every page holding more than tolerance / N of residual into
+    its rank and on to its links, so only pages the change reaches are
+    touched.
+
+    Teleports, dangling pages and a change of N add the same amount to
+    every page's residual, which only rescales the answer, so the ranks
+    are renormalized instead of pushing it to all N pages. Once more than
+    `max_active` of all pages need a push, the change has spread too far
+    to beat a sweep, and `power_iteration` finishes from the pushed ranks.
+    """
+    added, _, changed = delta
+    index = transition.index
+    old_rank = np.asarray(old["rank"], dtype=np.float64)
+    old_sources = np.asarray(old["sources"], dtype=np.int64)
+    old_targets = np.asarray(old["targets"], dtype=np.int64)
+    old_degree = np.bincount(old_sources, minlength=len(old_rank))
+
+    # positions[i] is the new index of old page i, or -1 if it was removed.
+    # Surviving pages keep their old rank, new pages start at 0
+    if list(old["pages"]) == list(transition.pages):
+        positions = np.arange(transition.n)
+    else:
+        positions = np.array([index.get(page, -1) for page in old["pages"]], dtype=np.int64)
+    survived = positions >= 0
+    rank = np.zeros(transition.n)
+    rank[positions[survived]] = old_rank[survived]
+
+    residual = np.zeros(transition.n)
+    changed = np.array([index[page] for page in changed], dtype=np.int64)
+    moved = ~survived | np.isin(positions, changed)
+    edges = np.flatnonzero(moved[old_sources] & survived[old_targets])
+    sources = old_sources[edges]
+    np.add.at(residual, positions[old_targets[edges]],
+              -damping_factor * old_rank[sources] / old_degree[sources])
+    spread_links(transition, residual, changed, damping_factor * rank[changed])
+
+    # New pages lack the teleport and dangling share every old rank holds
+    share = (1 - damping_factor
+             + damping_factor * old_rank[old_degree == 0].sum()) / len(old_rank)
+    residual[[index[page] for page in added]] += share
+
+    threshold = tolerance / transition.n
+    pushes = 0
+    while True:
+        active = np.flatnonzero(np.abs(residual) > threshold)
+        if len(active) == 0:
+            return rank / rank.sum(), pushes, 0
+        if len(active) > max_active * transition.n:
+            break
+        amounts = residual[active]
+        residual[active] = 0
+        rank[active] += amounts
+        spread_links(transition, residual, active, damping_factor * amounts)
+        pushes += len(active)
+
+    rank, iterations = power_iteration(transition, damping_factor, start=rank / rank.sum(),
+                                       tolerance=tolerance)
+    return rank, pushes, iterations
+
+
+def spread_links(transition, residual, pages, amounts):
+    """
+    Split each amounts[k] evenly over the links of pages[k] and add the
+    shares to `residual`. Amounts of dangling pages are dropped.
+    """
+    degree = transition.out_degree[pages]
+    linked = degree > 0
+    pages, amounts, degree = pages[linked], amounts[linked], degree[linked]
+    ends = np.cumsum(degree)
+    edges = (np.repeat(transition.link_offsets[pages] - (ends - degree), degree)
+             + np.arange(ends[-1] if len(ends) else 0))
+    np.add.at(residual, transition.link_targets[edges], np.repeat(amounts / degree, degree))
+
+
+def apply_delta(pages, sources, targets, added=(), removed=(), links=None):
+    """
+    Apply a corpus delta to an edge list.
+
+    `added` and `removed` are page names; `links` maps pages (new or
+    existing) to their new set of linked pages. Returns a new
+    (pages, sources, targets) with the same filtering as `crawl_edges`.
+    """
+    corpus = edges_to_corpus(pages, sources, targets)
+    for page in added:
+        corpus.setdefault(page, set())
+    for page in removed:
+        corpus.pop(page, None)
+    for page, page_links in (links or {}).items():
+        corpus[page] = set(page_links)
+
+    pages = sorted(corpus)
+    index = {page: i for i, page in enumerate(pages)}
+    sources = []
+    targets = []
+    for page in pages:
+        for link in sorted(corpus[page]):
+            if link in index and link != page:
+                sources.append(index[page])
+                targets.append(index[link])
+    return pages, sources, targets
+
+
+def diff_edges(old, new):
+    """
+    Compare two (pages, sources, targets) edge lists. Returns the sets of
+    pages added, removed and with a changed set of links.
+
+    Old page indices are mapped to new ones, every link is encoded as one
+    integer, source * (N + 1) + target + 1 (0 standing for a removed
+    target), and the pages with a link in only one of the two sorted
+    encoded lists are the changed ones.
+    """
+    old_pages = old["pages"]
+    new_pages, new_sources, new_targets = new
+    n = len(new_pages)
+
+    # positions[i] is the new index of old page i, or -1 if it was removed
+    if list(old_pages) == list(new_pages):
+        positions = np.arange(n)
+    else:
+        index = {page: i for i, page in enumerate(new_pages)}
+        positions = np.array([index.get(page, -1) for page in old_pages], dtype=np.int64)
+    is_new = np.ones(n, dtype=bool)
+    is_new[positions[positions >= 0]] = False
+
+    old_sources = positions[np.asarray(old["sources"], dtype=np.int64)]
+    old_targets = positions[np.asarray(old["targets"], dtype=np.int64)]
+    kept = old_sources >= 0
+    old_links = old_sources[kept] * (n + 1) + old_targets[kept] + 1
+    new_sources = np.asarray(new_sources, dtype=np.int64)
+    new_targets = np.asarray(new_targets, dtype=np.int64)
+    kept = ~is_new[new_sources]
+    new_links = new_sources[kept] * (n + 1) + new_targets[kept] + 1
+
+    links = np.sort(np.concatenate([distinct(old_links), distinct(new_links)]))
+    alone = np.ones(len(links) + 1, dtype=bool)
+    alone[1:-1] = links[1:] != links[:-1]
+    changed = distinct(links[alone[1:] & alone[:-1]] // (n + 1))
+    added = {new_pages[i] for i in np.flatnonzero(is_new).tolist()}
+    removed = {old_pages[i] for i in np.flatnonzero(positions < 0).tolist()}
+    return added, removed, {new_pages[i] for i in changed.tolist()}
+
+
+def distinct(values):
+    """
+    Returns the sorted distinct values. Sorts rather than `np.unique`,
+    whose hashing is several times slower on large integer arrays.
+    """
+    values = np.sort(values)
+    keep = np.ones(len(values), dtype=bool)
+    keep[1:] = values[1:] != values[:-1]
+    return values[keep]
+
+
+def state_path(directory):
+    return os.path.join(directory, FILENAME)
+
+
+def save_state(directory, pages, sources, targets, rank):
+    """
+    Store the ranks and the edge list they were computed from next to
+    the corpus.
+    """
+    np.savez(state_path(directory), pages=np.array(pages, dtype=str),
+             sources=np.asarray(sources, dtype=np.int64),
+             targets=np.asarray(targets, dtype=np.int64), rank=rank)
+
+
+def load_state(directory):
+    """
+    Returns the saved state as a dict of pages, sources, targets and
+    rank, or None if there is none.
+    """
+    try:
+        with np.load(state_path(directory)) as saved:
+            return {
+                "pages": saved["pages"].tolist(),
+                "sources": saved["sources"],
+                "targets": saved["targets"],
+                "rank": saved["rank"],
+            }
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+if __name__ == "__main__":
+    main()
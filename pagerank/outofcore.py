@@ -0,0 +1,138 @@
+import multiprocessing
+import os
+import sys
+
+import numpy as np
+
+from crawler import scan_file
+from engine import MAX_ITERATIONS, TOLERANCE
+from pagerank import DAMPING
+
+# Edges read from disk at a time, while sorting and while iterating
+BLOCK_EDGES = 1 << 22
+
+EDGES = "edges.npy"
+OUT_DEGREE = "out_degree.npy"
+PAGES = "pages.txt"
+
+
+def main():
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python outofcore.py corpus [output]")
+    corpus = sys.argv[1]
+    output = sys.argv[2] if len(sys.argv) == 3 else os.path.join(corpus, "edges")
+
+    write_edge_files(corpus, output)
+    rank, iterations = outofcore_pagerank(output, DAMPING)
+    print(f"PageRank Results from Out-of-Core Iteration ({iterations} iterations)")
+    with open(os.path.join(output, PAGES), encoding="utf-8") as f:
+        for i, page in enumerate(f):
+            print(f"  {page.rstrip()}: {rank[i]:.4f}")
+
+
+def write_edge_files(directory, output, processes=None, block_edges=BLOCK_EDGES):
+    """
+    Crawl `directory` into three files under `output`:
+
+        pages.txt       page names, one per line, in index order
+        out_degree.npy  number of links of each page
+        edges.npy       E x 2 int32 (source, target) rows sorted by target
+
+    Edges are first appended unsorted to a temporary file, then placed
+    by a counting sort on target, so only per-page arrays and one block
+    of edges are ever held in memory.
+    """
+    os.makedirs(output, exist_ok=True)
+    pages = sorted(filename for filename in os.listdir(directory)
+                   if filename.endswith(".html"))
+    index = {page: i for i, page in enumerate(pages)}
+    n = len(pages)
+    with open(os.path.join(output, PAGES), "w", encoding="utf-8") as f:
+        for page in pages:
+            f.write(page + "\n")
+
+    out_degree = np.zeros(n, dtype=np.int64)
+    in_degree = np.zeros(n, dtype=np.int64)
+    unsorted = os.path.join(output, "edges.unsorted")
+    with open(unsorted, "wb") as f, multiprocessing.Pool(processes) as pool:
+        tasks = [(directory, page) for page in pages]
+        for page, links in pool.imap(scan_file, tasks, max(1, n // 64)):
+            source = index[page]
+            targets = np.array(sorted(index[link] for link in links
+                                      if link in index and link != page), dtype=np.int32)
+            out_degree[source] = len(targets)
+            in_degree[targets] += 1
+            np.column_stack([np.full(len(targets), source, dtype=np.int32), targets]).tofile(f)
+
+    total = int(out_degree.sum())
+    edges = np.lib.format.open_memmap(os.path.join(output, EDGES), mode="w+",
+                                      dtype=np.int32, shape=(total, 2))
+    cursor = np.concatenate([[0], np.cumsum(in_degree)[:-1]])
+    pending = np.memmap(unsorted, dtype=np.int32, mode="r", shape=(total, 2)) if total else []
+    for start in range(0, total, block_edges):
+        block = np.asarray(pending[start:start + block_edges])
+        block = block[np.argsort(block[:, 1], kind="stable")]
+        targets, first, counts = np.unique(block[:, 1], return_index=True, return_counts=True)
+
+        # Place each edge after the edges already written for its target
+        within = np.arange(len(block)) - np.repeat(first, counts)
+        edges[cursor[block[:, 1]] + within] = block
+        cursor[targets] += counts
+    edges.flush()
+    del edges, pending
+    os.remove(unsorted)
+    np.save(os.path.join(output, OUT_DEGREE), out_degree)
+
+
+def save_edges(output, pages, sources, targets):
+    """
+    Write an in-memory edge list in the same format as
+    `write_edge_files`, sorting it by target.
+    """
+    os.makedirs(output, exist_ok=True)
+    with open(os.path.join(output, PAGES), "w", encoding="utf-8") as f:
+        for page in pages:
+            f.write(f"{page}\n")
+    sources = np.asarray(sources, dtype=np.int32)
+    targets = np.asarray(targets, dtype=np.int32)
+    order = np.argsort(targets, kind="stable")
+    np.save(os.path.join(output, EDGES), np.column_stack([sources[order], targets[order]]))
+    np.save(os.path.join(output, OUT_DEGREE), np.bincount(sources, minlength=len(pages)))
+
+
+def outofcore_pagerank(output, damping_factor, tolerance=TOLERANCE,
+                       max_iterations=MAX_ITERATIONS, block_edges=BLOCK_EDGES):
+    """
+    Power iteration that streams the memory-mapped edge file in blocks.
+
+    Only the out-degree array and two rank vectors stay resident, so
+    memory is O(N) whatever the number of edges. Because edges are
+    sorted by target, each block adds into one contiguous slice of the
+    new rank vector. Returns the rank vector and iterations used.
+    """
+    out_degree = np.load(os.path.join(output, OUT_DEGREE))
+    edges = np.load(os.path.join(output, EDGES), mmap_mode="r")
+    n = len(out_degree)
+    dangling = out_degree == 0
+    rank = np.full(n, 1 / n)
+
+    for iteration in range(1, max_iterations + 1):
+        share = np.divide(rank, out_degree, out=np.zeros(n), where=~dangling)
+        new_rank = np.zeros(n)
+        for start in range(0, len(edges), block_edges):
+            block = np.asarray(edges[start:start + block_edges])
+            lo, hi = block[0, 1], block[-1, 1]
+            new_rank[lo:hi + 1] += np.bincount(block[:, 1] - lo, weights=share[block[:, 0]],
+                                               minlength=hi - lo + 1)
+        new_rank = damping_factor * new_rank + (
+            1 - damping_factor + damping_factor * rank[dangling].sum()) / n
+
+        change = np.abs(new_rank - rank).sum()
+        rank = new_rank
+        if change < tolerance:
+            break
+    return rank, iteration
+
+
+if __name__ == "__main__":
+    main()
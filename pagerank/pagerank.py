@@ -15,12 +15,30 @@ def main():
     #print(f"{transition_model(corpus, "3.html", DAMPING)}")
     #sys.exit()
 
-    ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
-    print(f"PageRank Results from Sampling (n = {SAMPLES})")
+    # Sample with many surfers at once and iterate on a sparse matrix
+    # when NumPy is available
+    try:
+        import engine
+    except ImportError:
+        engine = None
+
+    if engine is None:
+        ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
+        samples = SAMPLES
+    else:
+        # Surfers take whole steps, so the count can exceed SAMPLES
+        transition = engine.Transition.from_corpus(corpus)
+        estimate, _, samples = engine.monte_carlo(transition, DAMPING, SAMPLES)
+        ranks = transition.ranks(estimate)
+    print(f"PageRank Results from Sampling (n = {samples})")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
 
-    ranks = iterate_pagerank(corpus, DAMPING)
+    if engine is None:
+        ranks = iterate_pagerank(corpus, DAMPING)
+    else:
+        rank, _ = engine.power_iteration(transition, DAMPING)
+        ranks = transition.ranks(rank)
     print(f"PageRank Results from Iteration")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
@@ -91,25 +109,30 @@ def sample_pagerank(corpus, damping_factor, n):
     PageRank values should sum to 1.
     """
 
-    sample_set = {}
-    for k in corpus.keys():
-        sample_set[k] = 0
-
-    sample_index = 0
-    page = random.choice(list(corpus.keys()))
-    while sample_index < n:
+    pages = list(corpus.keys())
+    index = {page: i for i, page in enumerate(pages)}
 
-        page_rank = sample_set.get(page)
-        sample_set.update({page: page_rank + 1})
+    # Precompute each page's links as a tuple of page indices, so a step
+    # needs no transition_model call and no allocation
+    links = [tuple(index[link] for link in corpus[page]) for page in pages]
 
-        probability_distribution = transition_model(corpus, page, damping_factor)
-        page = random.choices(list(probability_distribution.keys()), weights=list(probability_distribution.values()), k=1)[0]
+    counts = [0] * len(pages)
+    page = random.randrange(len(pages))
+    for _ in range(n):
+        counts[page] += 1
 
-        sample_index = sample_index + 1
+        # One draw decides follow vs. jump; below the damping factor it
+        # is also uniform over the page's links once rescaled
+        page_links = links[page]
+        r = random.random()
+        if page_links and r < damping_factor:
+            page = page_links[min(int(r / damping_factor * len(page_links)), len(page_links) - 1)]
+        else:
+            page = random.randrange(len(pages))
 
     pageranks = {}
-    for k, v in sample_set.items():
-        pageranks[k] = v / n
+    for i, page in enumerate(pages):
+        pageranks[page] = counts[i] / n
 
     return pageranks
 
@@ -0,0 +1,86 @@
+import os
+import sys
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from crawler import crawl_edges
+from engine import MAX_ITERATIONS, TOLERANCE, Transition
+from pagerank import DAMPING
+
+
+def main():
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python parallel.py corpus [workers]")
+    workers = int(sys.argv[2]) if len(sys.argv) == 3 else None
+    transition = Transition(*crawl_edges(sys.argv[1]))
+    rank, iterations = parallel_pagerank(transition, DAMPING, workers=workers)
+    ranks = transition.ranks(rank)
+    print(f"PageRank Results from Parallel Iteration ({iterations} iterations)")
+    for page in sorted(ranks):
+        print(f"  {page}: {ranks[page]:.4f}")
+
+
+def partition(matrix, parts):
+    """
+    Split the rows of a CSR matrix into at most `parts` contiguous
+    ranges holding about the same number of links each, since the work
+    of a mat-vec is proportional to its nonzeros rather than its rows.
+    Returns the list of (first row, end row) ranges.
+    """
+    n = matrix.shape[0]
+    cuts = np.searchsorted(matrix.indptr, np.linspace(0, matrix.nnz, parts + 1))
+    cuts = np.unique(np.clip(np.concatenate([[0], cuts[1:-1], [n]]), 0, n))
+    return [(int(lo), int(hi)) for lo, hi in zip(cuts[:-1], cuts[1:]) if lo < hi]
+
+
+def parallel_pagerank(transition, damping_factor, start=None, workers=None,
+                      tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+    """
+    Power iteration with the mat-vec split by destination rows across a
+    pool of threads.
+
+    Each thread owns one row block of the transition matrix and writes
+    its slice of the new rank vector, reading the whole previous vector;
+    both vectors are shared and swapped between iterations, never copied.
+    SciPy releases the GIL inside the sparse mat-vec, so the blocks run
+    on separate cores. The threads join once per iteration, when the
+    main thread adds up their L1 changes and the dangling-page mass.
+
+    Convergence is the same as `engine.power_iteration`: stop once the
+    L1 change is below `tolerance`. Returns the rank vector and the
+    iterations used.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    n = transition.n
+    blocks = [(lo, hi, transition.matrix[lo:hi])
+              for lo, hi in partition(transition.matrix, workers)]
+    if start is None:
+        rank = np.full(n, 1 / n)
+    else:
+        rank = np.array(start, dtype=np.float64)
+    new_rank = np.empty(n)
+
+    def update(block, constant):
+        lo, hi, rows = block
+        part = rows @ rank
+        part *= damping_factor
+        part += constant
+        change = np.abs(part - rank[lo:hi]).sum()
+        new_rank[lo:hi] = part
+        return change
+
+    with ThreadPoolExecutor(max_workers=len(blocks) or 1) as pool:
+        for iteration in range(1, max_iterations + 1):
+            constant = (1 - damping_factor + damping_factor * rank[transition.dangling].sum()) / n
+            change = sum(pool.map(update, blocks, [constant] * len(blocks)))
+            rank, new_rank = new_rank, rank
+            if change < tolerance:
+                break
+    return rank, iteration
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import heapq
+import sys
+
+from collections import deque
+
+import numpy as np
+import scipy.sparse
+
+from crawler import crawl_edges
+from engine import MAX_ITERATIONS, TOLERANCE, Transition
+from pagerank import DAMPING
+
+# Forward push stops once no page holds more residual than this per link
+PUSH_EPSILON = 1e-7
+TOP_K = 10
+
+# Seed sets solved together per block iteration in top_k
+BLOCK_SIZE = 256
+
+
+def main():
+    if len(sys.argv) < 3:
+        sys.exit("Usage: python personalized.py corpus seed.html [seed.html ...]")
+    transition = Transition(*crawl_edges(sys.argv[1]))
+
+    # Every seed page on the command line is its own seed set
+    seed_sets = [[seed] for seed in sys.argv[2:]]
+    for seeds, top in zip(seed_sets, top_k(transition, seed_sets, DAMPING)):
+        print(f"Personalized PageRank for {', '.join(seeds)}")
+        for page, score in top:
+            print(f"  {page}: {score:.4f}")
+
+
+def teleport_matrix(transition, seed_sets):
+    """
+    Returns a sparse N x K matrix whose k-th column is the teleport
+    distribution of seed_sets[k]. A seed set is either a list of pages
+    (weighted equally) or a dict of page -> weight.
+    """
+    rows = []
+    cols = []
+    values = []
+    for k, seeds in enumerate(seed_sets):
+        if not isinstance(seeds, dict):
+            seeds = {page: 1 for page in seeds}
+        total = sum(seeds.values())
+        for page, weight in seeds.items():
+            rows.append(transition.index[page])
+            cols.append(k)
+            values.append(weight / total)
+    return scipy.sparse.csr_matrix((values, (rows, cols)),
+                                   shape=(transition.n, len(seed_sets)))
+
+
+def block_pagerank(transition, teleports, damping_factor,
+                   tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+    """
+    Solve personalized PageRank for every column of `teleports` at once.
+
+    Each iteration is one sparse matrix times dense block product over
+    the shared transition matrix. Teleports, and the rank stranded on
+    dangling pages, go to each column's own teleport distribution.
+    Returns a dense N x K array and the number of iterations.
+    """
+    if scipy.sparse.issparse(teleports):
+        teleports = teleports.toarray()
+    teleports = np.asarray(teleports, dtype=np.float64)
+    rank = teleports.copy()
+    for iteration in range(1, max_iterations + 1):
+        stranded = rank[transition.dangling].sum(axis=0)
+        new_rank = (damping_factor * (transition.matrix @ rank)
+                    + (1 - damping_factor + damping_factor * stranded) * teleports)
+        change = np.abs(new_rank - rank).sum(axis=0).max()
+        rank = new_rank
+        if change < tolerance:
+            break
+    return rank, iteration
+
+
+def push_pagerank(transition, seeds, damping_factor, epsilon=PUSH_EPSILON, links=None):
+    """
+    Forward-push approximation of personalized PageRank for one sparse
+    seed distribution (dict of page index -> weight summing to 1).
+
+    Only pages near the seeds are touched, so the result is a dict of
+    page index -> score rather than a dense vector. Pushing stops once
+    every page's residual is at most epsilon times its out-degree; scores
+    only underestimate, by at most the residual mass left in total.
+    `links` may pass precomputed per-page link lists.
+    """
+    if links is None:
+        links = page_links(transition)
+    scores = {}
+    residual = dict(seeds)
+    queue = deque(residual)
+    queued = set(queue)
+    while queue:
+        page = queue.popleft()
+        queued.discard(page)
+        mass = residual.pop(page, 0)
+        scores[page] = scores.get(page, 0) + (1 - damping_factor) * mass
+
+        # Dangling pages send their share back to the seeds
+        targets = links[page]
+        if targets:
+            share = damping_factor * mass / len(targets)
+            spread = ((target, share) for target in targets)
+        else:
+            spread = ((seed, damping_factor * mass * weight) for seed, weight in seeds.items())
+
+        for target, amount in spread:
+            residual[target] = residual.get(target, 0) + amount
+            if target not in queued and residual[target] > epsilon * max(1, len(links[target])):
+                queue.append(target)
+                queued.add(target)
+    return scores
+
+
+def page_links(transition):
+    """
+    Returns each page's outgoing links as a list of page indices.
+    """
+    offsets = transition.link_offsets.tolist()
+    targets = transition.link_targets.tolist()
+    return [targets[offsets[i]:offsets[i + 1]] for i in range(transition.n)]
+
+
+def top_k(transition, seed_sets, damping_factor, k=TOP_K, method="block",
+          block_size=BLOCK_SIZE):
+    """
+    Returns, for every seed set, its `k` highest personalized PageRank
+    pages as a list of (page, score).
+
+    "block" solves `block_size` seed sets at a time with `block_pagerank`,
+    so at most N x block_size ranks are dense at once. "push" answers
+    each seed set with forward push and never builds a dense vector,
+    which pays off when the graph around the seeds is local.
+    """
+    results = []
+    if method == "block":
+        k = min(k, transition.n)
+        for first in range(0, len(seed_sets), block_size):
+            teleports = teleport_matrix(transition, seed_sets[first:first + block_size])
+            rank, _ = block_pagerank(transition, teleports, damping_factor)
+            for column in rank.T:
+                best = np.argpartition(-column, k - 1)[:k]
+                best = best[np.argsort(-column[best])]
+                results.append([(transition.pages[i], float(column[i])) for i in best])
+        return results
+
+    links = page_links(transition)
+    teleports = teleport_matrix(transition, seed_sets).tocsc()
+    for column in range(len(seed_sets)):
+        start, end = teleports.indptr[column], teleports.indptr[column + 1]
+        seeds = dict(zip(teleports.indices[start:end].tolist(),
+                         teleports.data[start:end].tolist()))
+        scores = push_pagerank(transition, seeds, damping_factor, links=links)
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        results.append([(transition.pages[i], score) for i, score in best])
+    return results
+
+
+if __name__ == "__main__":
+    main()
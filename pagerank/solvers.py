@@ -0,0 +1,237 @@
+import sys
+import time
+
+import numpy as np
+import scipy.sparse
+import scipy.sparse.linalg
+
+from crawler import crawl_edges
+from engine import MAX_ITERATIONS, TOLERANCE, Transition
+from pagerank import DAMPING
+
+# Extrapolate from the recent iterates every this many iterations
+EXTRAPOLATION_PERIOD = 10
+
+# Adaptive PageRank freezes a page after this many quiet iterations in a row
+FREEZE_AFTER = 3
+
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python solvers.py corpus")
+    transition = Transition(*crawl_edges(sys.argv[1]))
+
+    reference = None
+    print(f"{'solver':<14} {'iterations':>10} {'residual':>10} {'ms':>9} {'L1 vs power':>12}")
+    for method in SOLVERS:
+        solution = solve(transition, DAMPING, method)
+        if reference is None:
+            reference = solution.rank
+        error = np.abs(solution.rank - reference).sum()
+        print(f"{method:<14} {solution.iterations:>10} {solution.residuals[-1]:>10.2e} "
+              f"{1000 * solution.seconds:>9.2f} {error:>12.2e}")
+
+
+class Solution():
+    """
+    Result of a solver run: the rank vector, iterations used, the L1
+    change after each iteration and the wall-clock time in seconds.
+    """
+
+    def __init__(self, rank, iterations, residuals, seconds):
+        self.rank = rank
+        self.iterations = iterations
+        self.residuals = residuals
+        self.seconds = seconds
+
+
+def solve(transition, damping_factor, method="power", start=None,
+          tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+    """
+    Compute PageRank over `transition` with one of SOLVERS, iterating
+    until the L1 change drops below `tolerance`.
+    """
+    if start is None:
+        rank = np.full(transition.n, 1 / transition.n)
+    else:
+        rank = np.asarray(start, dtype=np.float64)
+    begin = time.perf_counter()
+    rank, residuals = SOLVERS[method](transition, damping_factor, rank,
+                                      tolerance, max_iterations)
+    return Solution(rank, len(residuals), residuals, time.perf_counter() - begin)
+
+
+def power(transition, damping_factor, rank, tolerance, max_iterations):
+    """
+    Plain power (Jacobi) iteration, as in `engine.power_iteration`.
+    """
+    residuals = []
+    for _ in range(max_iterations):
+        new_rank = transition.step(rank, damping_factor)
+        residuals.append(np.abs(new_rank - rank).sum())
+        rank = new_rank
+        if residuals[-1] < tolerance:
+            break
+    return rank, residuals
+
+
+def gauss_seidel(transition, damping_factor, rank, tolerance, max_iterations):
+    """
+    Gauss-Seidel sweeps: each page's new rank uses the ranks already
+    updated earlier in the same sweep, by solving the lower-triangular
+    part of (I - d M) exactly. Dangling-page mass uses the previous sweep.
+    """
+    matrix = damping_factor * transition.matrix
+    lower = (scipy.sparse.identity(transition.n, format="csr")
+             - scipy.sparse.tril(matrix, format="csr"))
+    upper = scipy.sparse.triu(matrix, k=1, format="csr")
+
+    residuals = []
+    for _ in range(max_iterations):
+        constant = (1 - damping_factor + damping_factor * rank[transition.dangling].sum()) / transition.n
+        new_rank = scipy.sparse.linalg.spsolve_triangular(
+            lower, upper @ rank + constant, lower=True
+        )
+        new_rank /= new_rank.sum()
+        residuals.append(np.abs(new_rank - rank).sum())
+        rank = new_rank
+        if residuals[-1] < tolerance:
+            break
+    return rank, residuals
+
+
+def extrapolated(extrapolate, history_size):
+    """
+    Wrap an extrapolation step into a solver: power iteration that
+    replaces the current iterate with `extrapolate(history)` every
+    EXTRAPOLATION_PERIOD iterations.
+
+    If the iteration after an extrapolation changes the rank by more
+    than the one before it, the extrapolated vector moved away from the
+    fixed point: it is rejected, iteration resumes from the iterate it
+    replaced, and the rest of the run is plain power iteration.
+    """
+    def solver(transition, damping_factor, rank, tolerance, max_iterations):
+        residuals = []
+        history = [rank]
+        replaced = None
+        extrapolating = True
+        for iteration in range(1, max_iterations + 1):
+            new_rank = transition.step(rank, damping_factor)
+            residuals.append(np.abs(new_rank - rank).sum())
+            if replaced is not None:
+                previous, before = replaced
+                replaced = None
+                if residuals[-1] >= before:
+                    rank = previous
+                    extrapolating = False
+                    continue
+            rank = new_rank
+            if residuals[-1] < tolerance:
+                break
+            history = history[-(history_size - 1):] + [rank]
+            if (extrapolating and iteration % EXTRAPOLATION_PERIOD == 0
+                    and len(history) == history_size):
+                replaced = (rank, residuals[-1])
+                rank = extrapolate(history)
+                history = [rank]
+        return rank, residuals
+    return solver
+
+
+def aitken(history):
+    """
+    Componentwise Aitken delta-squared from the last three iterates.
+
+    Only pages whose successive differences shrink geometrically, with
+    a ratio in (0, 1), are extrapolated; elsewhere the step would jump
+    away from the fixed point, so those pages keep x2.
+    """
+    x0, x1, x2 = history
+    first = x2 - x1
+    previous = x1 - x0
+    second = first - previous
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = first / previous
+    safe = (ratio > 0) & (ratio < 1) & (np.abs(second) > 1e-15)
+    rank = x2.copy()
+    rank[safe] = x2[safe] - first[safe] ** 2 / second[safe]
+    return normalize(rank, x2)
+
+
+def quadratic(history):
+    """
+    Quadratic extrapolation (Kamvar et al.) from the last four iterates:
+    fit the iterates to a degree-2 polynomial in the iteration matrix
+    by least squares and return its fixed point.
+    """
+    x0, x1, x2, x3 = history
+    y = np.column_stack([x1 - x0, x2 - x0])
+    gamma1, gamma2 = np.linalg.lstsq(y, -(x3 - x0), rcond=None)[0]
+    gamma3 = 1
+    beta0 = gamma1 + gamma2 + gamma3
+    beta1 = gamma2 + gamma3
+    beta2 = gamma3
+    return normalize(beta0 * x1 + beta1 * x2 + beta2 * x3, x3)
+
+
+def normalize(rank, fallback):
+    """
+    Clip negatives from an extrapolated vector and rescale it to sum to
+    1, keeping `fallback` if extrapolation produced nothing usable.
+    """
+    rank = np.clip(rank, 0, None)
+    total = rank.sum()
+    if not np.isfinite(total) or total == 0:
+        return fallback
+    return rank / total
+
+
+def adaptive(transition, damping_factor, rank, tolerance, max_iterations):
+    """
+    Adaptive PageRank: pages whose rank changed by less than
+    tolerance / N for FREEZE_AFTER iterations in a row are frozen and
+    their rows skipped in later iterations. Requiring a run of quiet
+    iterations keeps a page that stalls by coincidence from freezing.
+    """
+    n = transition.n
+    page_tolerance = tolerance / n
+    active = np.arange(n)
+    quiet = np.zeros(n, dtype=np.int64)
+    rows = transition.matrix
+
+    residuals = []
+    for _ in range(max_iterations):
+        constant = (1 - damping_factor + damping_factor * rank[transition.dangling].sum()) / n
+        updated = damping_factor * (rows @ rank) + constant
+        change = np.abs(updated - rank[active])
+        new_rank = rank.copy()
+        new_rank[active] = updated
+        residuals.append(change.sum())
+        rank = new_rank
+        if residuals[-1] < tolerance:
+            break
+
+        # Drop converged pages from the rows computed next time
+        quiet = np.where(change < page_tolerance, quiet + 1, 0)
+        still_active = quiet < FREEZE_AFTER
+        if not still_active.all():
+            active = active[still_active]
+            quiet = quiet[still_active]
+            rows = transition.matrix[active]
+            if len(active) == 0:
+                break
+    return rank / rank.sum(), residuals
+
+
+SOLVERS = {
+    "power": power,
+    "gauss-seidel": gauss_seidel,
+    "aitken": extrapolated(aitken, 3),
+    "quadratic": extrapolated(quadratic, 4),
+    "adaptive": adaptive,
+}
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Tic Tac Toe on bitboards
+
+A position is two 9-bit masks, one for the cells of X and one for the
+cells of O, where cell (i, j) is bit i * 3 + j.
+"""
+
+X = "X"
+O = "O"
+EMPTY = None
+
+FULL = 0b111111111
+
+# The 8 winning lines: 3 rows, 3 columns and 2 diagonals
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100,
+)
+
+# WINNING[mask] is True when the cells in `mask` contain a winning line
+WINNING = tuple(any(mask & line == line for line in WIN_MASKS) for mask in range(FULL + 1))
+
+# (cell, bit) pairs, center first, then corners, then edges
+ORDER = tuple((cell, 1 << cell) for cell in (4, 0, 2, 6, 8, 1, 3, 5, 7))
+
+
+def from_board(board):
+    """
+    Returns the (x, o) masks of a list board.
+    """
+    x = 0
+    o = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == X:
+                x |= 1 << (i * 3 + j)
+            elif board[i][j] == O:
+                o |= 1 << (i * 3 + j)
+    return x, o
+
+
+def to_board(x, o):
+    """
+    Returns the list board of the (x, o) masks.
+    """
+    board = []
+    for i in range(3):
+        row = []
+        for j in range(3):
+            bit = 1 << (i * 3 + j)
+            row.append(X if x & bit else O if o & bit else EMPTY)
+        board.append(row)
+    return board
+
+
+def player(x, o):
+    """
+    Returns player who has the next turn.
+    """
+    return X if x.bit_count() == o.bit_count() else O
+
+
+def actions(x, o):
+    """
+    Returns the set of empty cells as (i, j) actions.
+    """
+    filled = x | o
+    return {divmod(cell, 3) for cell in range(9) if not filled & (1 << cell)}
+
+
+def result(x, o, action):
+    """
+    Returns the (x, o) masks after the player to move takes `action`.
+    """
+    i, j = action
+    bit = 1 << (i * 3 + j)
+    if not (0 <= i <= 2 and 0 <= j <= 2) or (x | o) & bit:
+        raise ValueError(f"invalid action {action}")
+    if x.bit_count() == o.bit_count():
+        return x | bit, o
+    return x, o | bit
+
+
+def winner(x, o):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    if WINNING[x]:
+        return X
+    if WINNING[o]:
+        return O
+    return None
+
+
+def terminal(x, o):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    return WINNING[x] or WINNING[o] or x | o == FULL
+
+
+def utility(x, o):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    if WINNING[x]:
+        return 1
+    if WINNING[o]:
+        return -1
+    return 0
+
+
+def value(x, o, alpha=-1, beta=1):
+    """
+    Alpha-beta value of a position for X, exact inside (alpha, beta).
+
+    Works on ints only: moves come from the precomputed ORDER, wins
+    from the WINNING table and the side to move from popcounts, so no
+    lists, sets or boards are built while searching.
+    """
+    if WINNING[x]:
+        return 1
+    if WINNING[o]:
+        return -1
+    filled = x | o
+    if filled == FULL:
+        return 0
+
+    if x.bit_count() == o.bit_count():
+        for _, bit in ORDER:
+            if not filled & bit:
+                score = value(x | bit, o, alpha, beta)
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return alpha
+    for _, bit in ORDER:
+        if not filled & bit:
+            score = value(x, o | bit, alpha, beta)
+            if score < beta:
+                beta = score
+                if alpha >= beta:
+                    break
+    return beta
+
+
+def best_move(x, o):
+    """
+    Returns the optimal cell for the player to move, or None if the
+    game is over.
+    """
+    if terminal(x, o):
+        return None
+    x_to_move = x.bit_count() == o.bit_count()
+    best = None
+    best_score = None
+    for cell, bit in ORDER:
+        if (x | o) & bit:
+            continue
+        if x_to_move:
+            score = value(x | bit, o)
+        else:
+            score = -value(x, o | bit)
+        if best_score is None or score > best_score:
+            best = cell
+            best_score = score
+            if score == 1:
+                break
+    return best
+
+
+def minimax(board):
+    """
+    Returns the optimal action for the current player on a list board.
+    """
+    cell = best_move(*from_board(board))
+    return None if cell is None else divmod(cell, 3)
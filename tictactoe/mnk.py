@@ -0,0 +1,353 @@
+"""
+m,n,k-games: Tic Tac Toe on an m x n board where k in a row wins
+"""
+
+import sys
+import time
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Seconds the AI may think about each move
+TIME_BUDGET = 1.0
+
+# Score of a won position; wins found sooner score higher
+WIN = 1000000
+
+# Boards with more cells than this only search the most promising
+# BRANCHING moves next to existing marks; smaller boards search every move
+SMALL_BOARD = 16
+BRANCHING = 12
+
+
+def main():
+    if len(sys.argv) not in [4, 5]:
+        sys.exit("Usage: python mnk.py m n k [seconds]")
+    m, n, k = (int(arg) for arg in sys.argv[1:4])
+    budget = float(sys.argv[4]) if len(sys.argv) == 5 else TIME_BUDGET
+
+    # The AI plays both sides
+    game = Game(m, n, k)
+    board = game.initial_state()
+    while not game.terminal(board):
+        search = Search(game, board)
+        action = search.run(budget)
+        print(f"{game.player(board)} plays {action} "
+              f"(depth {search.depth}, {search.nodes} nodes)")
+        board = game.result(board, action)
+    for row in board:
+        print(" ".join(cell or "." for cell in row))
+    winner = game.winner(board)
+    print(f"Game Over: {winner} wins." if winner else "Game Over: Tie.")
+
+
+class Game():
+    """
+    Rules of the m,n,k-game, with the same functions as tictactoe.py
+    for boards given as lists of rows of X, O or EMPTY.
+    """
+
+    def __init__(self, m=3, n=3, k=3):
+        if k > max(m, n):
+            raise ValueError(f"no line of {k} fits on a {m}x{n} board")
+        self.m = m
+        self.n = n
+        self.k = k
+        self.size = m * n
+
+        # Every run of k cells in a row, column or diagonal, and the runs
+        # through each cell
+        self.windows = []
+        for i in range(m):
+            for j in range(n):
+                for di, dj in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+                    end_i = i + di * (k - 1)
+                    end_j = j + dj * (k - 1)
+                    if 0 <= end_i < m and 0 <= end_j < n:
+                        self.windows.append([(i + di * step) * n + j + dj * step
+                                             for step in range(k)])
+        self.cell_windows = [[] for _ in range(self.size)]
+        for w, window in enumerate(self.windows):
+            for cell in window:
+                self.cell_windows[cell].append(w)
+
+        self.neighbors = []
+        for cell in range(self.size):
+            i, j = divmod(cell, n)
+            self.neighbors.append([ni * n + nj
+                                   for ni in range(max(0, i - 1), min(m, i + 2))
+                                   for nj in range(max(0, j - 1), min(n, j + 2))
+                                   if (ni, nj) != (i, j)])
+
+        # Value of a window holding c marks of one player and none of
+        # the other; a full window is a win and handled separately
+        self.weights = [0] + [10 ** c for c in range(k - 1)] + [WIN]
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.n for _ in range(self.m)]
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        x = sum(row.count(X) for row in board)
+        o = sum(row.count(O) for row in board)
+        return X if x == o else O
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        return {(i, j) for i in range(self.m) for j in range(self.n)
+                if board[i][j] == EMPTY}
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        i, j = action
+        if not (0 <= i < self.m and 0 <= j < self.n) or board[i][j] != EMPTY:
+            raise ValueError(f"invalid action {action}")
+        new_board = [row.copy() for row in board]
+        new_board[i][j] = self.player(board)
+        return new_board
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        cells = [cell for row in board for cell in row]
+        for window in self.windows:
+            first = cells[window[0]]
+            if first != EMPTY and all(cells[cell] == first for cell in window):
+                return first
+        return None
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        return (self.winner(board) is not None
+                or all(cell != EMPTY for row in board for cell in row))
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        return {X: 1, O: -1, None: 0}[self.winner(board)]
+
+    def best_move(self, board, budget=TIME_BUDGET, max_depth=None):
+        """
+        Returns the best action found for the current player within
+        `budget` seconds, or None if the game is over.
+        """
+        return Search(self, board).run(budget, max_depth)
+
+
+class Timeout(Exception):
+    pass
+
+
+class Search():
+    """
+    Iterative-deepening alpha-beta search from one position.
+
+    The board is a flat list of 1 (X), -1 (O) or 0 that moves are made
+    on and taken back in place. Every window keeps a count of each
+    player's marks, so a move only touches the windows through its
+    cell: that updates the heuristic score, and a window reaching k
+    marks is a win, detected without rescanning the board.
+    """
+
+    def __init__(self, game, board):
+        self.game = game
+        self.cells = [1 if cell == X else -1 if cell == O else 0
+                      for row in board for cell in row]
+        self.side = 1 if game.player(board) == X else -1
+        self.empty = self.cells.count(0)
+        self.stones = [cell for cell in range(game.size) if self.cells[cell]]
+        self.counts = {1: [0] * len(game.windows), -1: [0] * len(game.windows)}
+        self.score = 0
+        self.won = False
+        for cell in self.stones:
+            for w in game.cell_windows[cell]:
+                self.counts[self.cells[cell]][w] += 1
+        for w in range(len(game.windows)):
+            self.score += self.window_value(w)
+            if max(self.counts[1][w], self.counts[-1][w]) == game.k:
+                self.won = True
+        self.nodes = 0
+        self.depth = 0
+        self.deadline = None
+
+    def window_value(self, w):
+        """
+        Heuristic value of window `w` for X.
+        """
+        x = self.counts[1][w]
+        o = self.counts[-1][w]
+        if x and o:
+            return 0
+        return self.game.weights[x] - self.game.weights[o]
+
+    def make(self, cell):
+        """
+        Play `cell` for the side to move. Returns True if it wins.
+        """
+        side = self.side
+        counts = self.counts[side]
+        won = False
+        for w in self.game.cell_windows[cell]:
+            self.score -= self.window_value(w)
+            counts[w] += 1
+            self.score += self.window_value(w)
+            if counts[w] == self.game.k:
+                won = True
+        self.cells[cell] = side
+        self.stones.append(cell)
+        self.empty -= 1
+        self.side = -side
+        return won
+
+    def unmake(self, cell):
+        """
+        Take back the last move, which was played on `cell`.
+        """
+        side = -self.side
+        counts = self.counts[side]
+        for w in self.game.cell_windows[cell]:
+            self.score -= self.window_value(w)
+            counts[w] -= 1
+            self.score += self.window_value(w)
+        self.cells[cell] = 0
+        self.stones.pop()
+        self.empty += 1
+        self.side = side
+
+    def gain(self, cell):
+        """
+        How much playing `cell` extends the mover's lines plus how much
+        it blocks the opponent's, used to order moves.
+        """
+        weights = self.game.weights
+        mine = self.counts[self.side]
+        theirs = self.counts[-self.side]
+        total = 0
+        for w in self.game.cell_windows[cell]:
+            if not theirs[w]:
+                total += weights[mine[w] + 1] - weights[mine[w]]
+            if not mine[w]:
+                total += weights[theirs[w] + 1] - weights[theirs[w]]
+        return total
+
+    def candidates(self, first=None):
+        """
+        Returns the moves to search, best first by `gain`. On large
+        boards only empty cells next to a mark are considered, at most
+        BRANCHING of them.
+        """
+        game = self.game
+        if game.size <= SMALL_BOARD:
+            moves = [cell for cell in range(game.size) if not self.cells[cell]]
+        elif not self.stones:
+            moves = [(game.m // 2) * game.n + game.n // 2]
+        else:
+            moves = {neighbor for cell in self.stones for neighbor in game.neighbors[cell]
+                     if not self.cells[neighbor]}
+        moves = sorted(moves, key=self.gain, reverse=True)
+        if game.size > SMALL_BOARD:
+            moves = moves[:BRANCHING]
+        if first is not None and first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+        return moves
+
+    def negamax(self, depth, alpha, beta, ply):
+        """
+        Alpha-beta value of the position for the side to move, searching
+        `depth` more moves and scoring the horizon with the heuristic.
+        """
+        self.nodes += 1
+        if self.nodes % 1024 == 0 and time.perf_counter() > self.deadline:
+            raise Timeout
+        if depth == 0:
+            return self.side * self.score
+
+        best = -WIN
+        for cell in self.candidates():
+            if self.make(cell):
+                value = WIN - ply
+            elif self.empty == 0:
+                value = 0
+            else:
+                value = -self.negamax(depth - 1, -beta, -alpha, ply + 1)
+            self.unmake(cell)
+            if value > best:
+                best = value
+                if best > alpha:
+                    alpha = best
+                    if alpha >= beta:
+                        break
+        return best
+
+    def run(self, budget=TIME_BUDGET, max_depth=None):
+        """
+        Search one ply deeper at a time until `budget` seconds pass,
+        `max_depth` is reached, the game is solved to the end or a
+        forced result is found. Returns the best action of the deepest
+        completed search, as (i, j), or None if the game is over.
+        """
+        if self.won or self.empty == 0:
+            return None
+        self.deadline = time.perf_counter() + budget
+        best = self.candidates()[0]
+        max_depth = min(max_depth or self.empty, self.empty)
+        for depth in range(1, max_depth + 1):
+            try:
+                value, move = self.search_root(depth, best)
+            except Timeout:
+                break
+            best = move
+            self.depth = depth
+            if abs(value) >= WIN - self.game.size:
+                break
+        return divmod(best, self.game.n)
+
+    def search_root(self, depth, first):
+        """
+        Search every root move to `depth`, trying `first` (the best move
+        of the previous depth) first. Returns (value, move).
+        """
+        alpha = -WIN - 1
+        best = None
+        for cell in self.candidates(first):
+            if self.make(cell):
+                value = WIN
+            elif self.empty == 0:
+                value = 0
+            else:
+                value = -self.negamax(depth - 1, -WIN - 1, -alpha, 1)
+            self.unmake(cell)
+            if value > alpha:
+                alpha = value
+                best = cell
+        return alpha, best
+
+
+def minimax(board, k=None, budget=TIME_BUDGET):
+    """
+    Returns the best action for the current player on a board of any
+    size, where `k` in a row wins (the board's shorter side, at most 5,
+    by default).
+    """
+    m = len(board)
+    n = len(board[0])
+    return Game(m, n, k or min(m, n, 5)).best_move(board, budget)
+
+
+if __name__ == "__main__":
+    main()
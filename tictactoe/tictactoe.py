@@ -4,11 +4,55 @@ Tic Tac Toe Player
 
 import copy
 import math
+import os
+import pickle
+
+import bitboard
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Moves are tried center first, then corners, then edges: the center
+# and corners lie on more winning lines, so they cause earlier cutoffs
+MOVE_ORDER = [(1, 1),
+              (0, 0), (0, 2), (2, 0), (2, 2),
+              (0, 1), (1, 0), (1, 2), (2, 1)]
+
+# Search used by minimax: "table", "bitboard", "inplace", "alphabeta" or "full"
+SEARCH = "table"
+
+# Fully solved transposition table, saved next to this file
+TABLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tictactoe.table")
+
+
+def symmetries():
+    """
+    Returns the 8 symmetries of the board (4 rotations, each with and
+    without a mirror) as lists mapping cell i * 3 + j to its new cell.
+    """
+    perms = []
+    for mirror in [False, True]:
+        for turns in range(4):
+            perm = []
+            for cell in range(9):
+                i, j = divmod(cell, 3)
+                if mirror:
+                    j = 2 - j
+                for _ in range(turns):
+                    i, j = j, 2 - i
+                perm.append(i * 3 + j)
+            perms.append(perm)
+    return perms
+
+
+SYMMETRIES = symmetries()
+INVERSES = [[perm.index(cell) for cell in range(9)] for perm in SYMMETRIES]
+
+# Canonical board key -> (value, best move as a cell of the canonical
+# board); loaded from TABLE on first use
+transpositions = None
+
 
 def initial_state():
     """
@@ -156,15 +200,248 @@ def minimax_recursive(board):
         return min, min_action
 
 
+def ordered_actions(board):
+    """
+    Returns the available actions on the board in MOVE_ORDER.
+    """
+    return [action for action in MOVE_ORDER if board[action[0]][action[1]] == EMPTY]
+
+
+def alphabeta(board, alpha=-1, beta=1):
+    """
+    Returns (value, action) like minimax_recursive, pruning every branch
+    that cannot change the result. Values are exact inside the
+    (alpha, beta) window; outside it they are only a bound. Since no
+    game is worth more than 1 or less than -1, a forced win ends the
+    search of a position at once.
+    """
+    if terminal(board):
+        return utility(board), None
+
+    best_action = None
+    if player(board) == X:
+        best = -math.inf
+        for action in ordered_actions(board):
+            value, _ = alphabeta(result(board, action), alpha, beta)
+            if value > best:
+                best = value
+                best_action = action
+            alpha = max(alpha, best)
+            if alpha >= beta:
+                break
+    else:
+        best = math.inf
+        for action in ordered_actions(board):
+            value, _ = alphabeta(result(board, action), alpha, beta)
+            if value < best:
+                best = value
+                best_action = action
+            beta = min(beta, best)
+            if alpha >= beta:
+                break
+    return best, best_action
+
+
+def wins(board, i, j):
+    """
+    Returns True if the mark at (i, j) completes a line through (i, j).
+    Only the row, column and diagonals through that cell are checked.
+    """
+    mark = board[i][j]
+    if board[i][0] == mark and board[i][1] == mark and board[i][2] == mark:
+        return True
+    if board[0][j] == mark and board[1][j] == mark and board[2][j] == mark:
+        return True
+    if i == j and board[0][0] == mark and board[1][1] == mark and board[2][2] == mark:
+        return True
+    if i + j == 2 and board[0][2] == mark and board[1][1] == mark and board[2][0] == mark:
+        return True
+    return False
+
+
+def inplace_search(board, turn, empty, alpha=-1, beta=1):
+    """
+    Alpha-beta value for X of a non-terminal board, searched by making
+    each move on `board` itself, recursing and taking the move back.
+
+    The side to move (`turn`) and the number of empty cells are passed
+    down rather than recounted, and a win is only looked for on the
+    lines through the move just made, so no board is copied and
+    `player` and `utility` are never called. `board` is left as it
+    was found.
+    """
+    next_turn = O if turn == X else X
+    for i, j in MOVE_ORDER:
+        if board[i][j] != EMPTY:
+            continue
+        board[i][j] = turn
+        if wins(board, i, j):
+            value = 1 if turn == X else -1
+        elif empty == 1:
+            value = 0
+        else:
+            value = inplace_search(board, next_turn, empty - 1, alpha, beta)
+        board[i][j] = EMPTY
+
+        if turn == X:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+        if alpha >= beta:
+            break
+    return alpha if turn == X else beta
+
+
+def inplace_minimax(board):
+    """
+    Returns (value, action) like minimax_recursive, using make/unmake
+    search on a single working copy of the board.
+    """
+    if terminal(board):
+        return utility(board), None
+    board = [row.copy() for row in board]
+    turn = player(board)
+    next_turn = O if turn == X else X
+    empty = sum(row.count(EMPTY) for row in board)
+    goal = 1 if turn == X else -1
+
+    best = None
+    for i, j in MOVE_ORDER:
+        if board[i][j] != EMPTY:
+            continue
+        board[i][j] = turn
+        if wins(board, i, j):
+            value = goal
+        elif empty == 1:
+            value = 0
+        else:
+            value = inplace_search(board, next_turn, empty - 1)
+        board[i][j] = EMPTY
+        if best is None or value * goal > best[0] * goal:
+            best = (value, (i, j))
+            if value == goal:
+                break
+    return best
+
+
+def canonical(board):
+    """
+    Returns the key of the board under the symmetry that makes it
+    smallest, along with the index of that symmetry in SYMMETRIES.
+    All 8 symmetric versions of a board share the same key.
+    """
+    cells = [board[i][j] or "-" for i in range(3) for j in range(3)]
+    best = None
+    for k, perm in enumerate(SYMMETRIES):
+        key = [None] * 9
+        for cell in range(9):
+            key[perm[cell]] = cells[cell]
+        key = "".join(key)
+        if best is None or key < best[0]:
+            best = (key, k)
+    return best
+
+
+def transposition_search(board):
+    """
+    Returns (value, action) like minimax_recursive, but every position
+    is solved once per symmetry class: results are cached by canonical
+    key, with the best move stored as a canonical cell and mapped back
+    through the symmetry on each lookup. Values stored are always exact;
+    a forced win still ends the search of a position early.
+    """
+    global transpositions
+    if transpositions is None:
+        transpositions = load_table()
+
+    key, k = canonical(board)
+    if key not in transpositions:
+        if terminal(board):
+            transpositions[key] = (utility(board), None)
+        else:
+            turn = player(board)
+            goal = 1 if turn == X else -1
+            best = None
+            for action in ordered_actions(board):
+                value, _ = transposition_search(result(board, action))
+                if best is None or value * goal > best[0] * goal:
+                    best = (value, action)
+                if value == goal:
+                    break
+            value, (i, j) = best
+            transpositions[key] = (value, SYMMETRIES[k][i * 3 + j])
+
+    value, cell = transpositions[key]
+    if cell is None:
+        return value, None
+    return value, divmod(INVERSES[k][cell], 3)
+
+
+def solve_table():
+    """
+    Solve every position reachable from the empty board, so that any
+    later `minimax` call is a single table lookup. Returns the table.
+    """
+    seen = set()
+    stack = [initial_state()]
+    while stack:
+        board = stack.pop()
+        key, _ = canonical(board)
+        if key in seen:
+            continue
+        seen.add(key)
+        transposition_search(board)
+        if not terminal(board):
+            for action in actions(board):
+                stack.append(result(board, action))
+    return transpositions
+
+
+def save_table(path=TABLE):
+    """
+    Fully solve the game and store the transposition table at `path`.
+    """
+    table = solve_table()
+    with open(path, "wb") as f:
+        pickle.dump(table, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return table
+
+
+def load_table(path=TABLE):
+    """
+    Returns the transposition table saved at `path`, or an empty table
+    if there is none.
+    """
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return {}
+
+
 def minimax(board):
     """
     Returns the optimal action for the current player on the board.
     """
 
-    minmax, action = minimax_recursive(board)
+    if SEARCH == "full":
+        minmax, action = minimax_recursive(board)
+    elif SEARCH == "alphabeta":
+        minmax, action = alphabeta(board)
+    elif SEARCH == "bitboard":
+        action = bitboard.minimax(board)
+    elif SEARCH == "inplace":
+        minmax, action = inplace_minimax(board)
+    else:
+        minmax, action = transposition_search(board)
     return action
 
     """for i in range(3):
         for j in range(3):
             if board[i][j] == EMPTY:
                 return (i, j)"""
+
+
+if __name__ == "__main__":
+    table = save_table()
+    print(f"Solved {len(table)} positions up to symmetry into {TABLE}")